@@ -0,0 +1,125 @@
+import sys
+import numpy as np
+from keystrokes import KeystrokeLog, COLUMNS, KEY
+
+#Typing analytics over the whole keystroke history, loaded into flat NumPy columns
+#Every metric is a vectorized group-by (np.bincount over dense char ids), no Python loop per keystroke
+
+DTYPES = {'t': '<i8', 'index': '<u4', 'expected': '<u4', 'typed': '<u4', 'kind': 'u1'}
+
+
+def _group_mean(ids, values, size):  #(present ids, mean value, count) for ids in range(size)
+    counts = np.bincount(ids, minlength=size)
+    sums = np.bincount(ids, weights=values, minlength=size)
+    present = np.flatnonzero(counts)
+    return present, sums[present] / counts[present], counts[present]
+
+
+def _dense_ids(codes):  #Map code points to 0..k-1, with a lookup table instead of a sort when they fit
+    if len(codes) and int(codes.max()) < 0x10000:
+        table = np.zeros(0x10000, dtype=np.int64)
+        seen = np.bincount(codes, minlength=0x10000) > 0
+        chars = np.flatnonzero(seen)
+        table[chars] = np.arange(len(chars))
+        return chars, table[codes]
+    return np.unique(codes, return_inverse=True)
+
+
+class Analytics:
+    def __init__(self, columns, sessions, max_gap_ms=2000):
+        self.columns = columns  # name -> flat array over all sessions
+        self.sessions = sessions  # Session ids in load order
+        self.max_gap_ns = max_gap_ms * 1_000_000  # Longer pauses are not counted as key latency
+        self._prepare()
+
+    @classmethod
+    def load(cls, path, max_gap_ms=2000):
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            data = b''
+        parts = {name: [] for name, _ in COLUMNS}
+        sessions, sizes = [], []
+        for session_id, count, pos in KeystrokeLog(path).blocks(data):
+            for name, _ in COLUMNS:
+                dtype = np.dtype(DTYPES[name])
+                parts[name].append(np.frombuffer(data, dtype=dtype, count=count, offset=pos))
+                pos += count * dtype.itemsize
+            sessions.append(session_id)
+            sizes.append(count)
+        columns = {name: np.concatenate(chunks) if chunks else np.zeros(0, DTYPES[name])
+                   for name, chunks in parts.items()}
+        columns['session'] = np.repeat(np.arange(len(sizes)), sizes)
+        return cls(columns, np.array(sessions, dtype=np.uint64), max_gap_ms)
+
+    def _prepare(self):  #Latency of each event = time since the previous event of the same session
+        t, session = self.columns['t'], self.columns['session']
+        self.is_key = self.columns['kind'] == KEY
+        self.latency = np.zeros(len(t), dtype=np.int64)
+        self.has_prev = np.zeros(len(t), dtype=bool)
+        if len(t) > 1:
+            self.latency[1:] = np.diff(t)
+            self.has_prev[1:] = session[1:] == session[:-1]
+        self.timed = self.has_prev & self.is_key & (self.latency > 0) & (self.latency <= self.max_gap_ns)
+        self.chars, self.char_id = _dense_ids(self.columns['expected'])  # Code point of each id, id of each event
+
+    @property
+    def keystrokes(self):
+        return len(self.columns['t'])
+
+    def per_key(self):  #{char: (mean latency ms, samples)}
+        mask = self.timed
+        ids, means, counts = _group_mean(self.char_id[mask], self.latency[mask] / 1e6, len(self.chars))
+        return {chr(k): (m, c) for k, m, c in zip(self.chars[ids].tolist(), means.tolist(), counts.tolist())}
+
+    def _bigram_mean(self, mask, values, min_count):  #{'th': (mean of values, samples)} over rows in mask
+        mask = mask.copy()
+        mask[1:] &= self.is_key[:-1]  # has_prev is False for the first event, so index - 1 stays in range
+        rows = np.flatnonzero(mask)
+        k = len(self.chars)
+        ids, means, counts = _group_mean(self.char_id[rows - 1] * k + self.char_id[rows], values[rows], k * k)
+        keep = counts >= min_count
+        firsts, seconds = self.chars[ids[keep] // k].tolist(), self.chars[ids[keep] % k].tolist()
+        return {chr(a) + chr(b): (m, c) for a, b, m, c in zip(firsts, seconds, means[keep].tolist(), counts[keep].tolist())}
+
+    def per_bigram(self, min_count=1):  #{'th': (mean latency ms, samples)}
+        return self._bigram_mean(self.timed, self.latency / 1e6, min_count)
+
+    def errors(self):  #{char: (error rate, attempts)} over key presses
+        mask = self.is_key
+        wrong = (self.columns['typed'][mask] != self.columns['expected'][mask]).astype(np.float64)
+        ids, rates, counts = _group_mean(self.char_id[mask], wrong, len(self.chars))
+        return {chr(k): (r, c) for k, r, c in zip(self.chars[ids].tolist(), rates.tolist(), counts.tolist())}
+
+    def bigram_errors(self, min_count=1):  #{'th': (error rate on the second key, attempts)}
+        wrong = (self.columns['typed'] != self.columns['expected']).astype(np.float64)
+        return self._bigram_mean(self.has_prev & self.is_key, wrong, min_count)
+
+    def consistency(self):  #Per-session latency mean/stdev in ms and the overall coefficient of variation
+        mask = self.timed
+        session = self.columns['session'][mask]
+        ms = self.latency[mask] / 1e6
+        n = np.bincount(session, minlength=len(self.sessions)).astype(np.float64)
+        total = np.bincount(session, weights=ms, minlength=len(self.sessions))
+        squares = np.bincount(session, weights=ms * ms, minlength=len(self.sessions))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / n
+            stdev = np.sqrt(np.maximum(squares / n - mean * mean, 0))
+        overall = float(ms.std() / ms.mean()) if len(ms) else 0.0
+        return {'mean': mean, 'stdev': stdev, 'cv': overall}
+
+    def report(self, top=5):  #Plain text summary for the stats menu and the CLI
+        lines = [f'Keystrokes: {self.keystrokes} in {len(self.sessions)} sessions']
+        slow = sorted(self.per_key().items(), key=lambda item: -item[1][0])[:top]
+        lines.append('Slowest keys: ' + ', '.join(f'{k!r} {m:.0f}ms' for k, (m, c) in slow))
+        bigrams = sorted(self.per_bigram(min_count=3).items(), key=lambda item: -item[1][0])[:top]
+        lines.append('Slowest bigrams: ' + ', '.join(f'{k!r} {m:.0f}ms' for k, (m, c) in bigrams))
+        missed = sorted(self.errors().items(), key=lambda item: -item[1][0])[:top]
+        lines.append('Most missed: ' + ', '.join(f'{k!r} {r * 100:.0f}%' for k, (r, c) in missed if r > 0))
+        lines.append(f'Consistency (latency CV): {self.consistency()["cv"]:.2f}')
+        return '\n'.join(lines)
+
+
+if __name__ == "__main__":  #python analytics.py [keystrokes.bin]
+    print(Analytics.load(sys.argv[1] if len(sys.argv) > 1 else 'keystrokes.bin').report())
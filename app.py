@@ -1,43 +1,41 @@
-import tkinter as tk, os, time, random, json
-from PIL import Image, ImageTk
-
-def open_json(path):  #read JSON content from a file
-    try:
-        with open(path, 'r', encoding='utf-8') as file:
-            return json.load(file)
-    except Exception as e:
-        print(f'Error: {e}')
-
-def dump_json(data, path):
-    try:
-        with open(path, 'w') as file:
-            json.dump(data, path)
-    except Exception as e:
-        print(f'Error: {e}')
-
-def find_avg(i):
-    try:
-        return sum(i) / len(i)
-    except Exception as e:
-        print(f'Error: {e}')
-        return 0
+from startup import StartupTimer
+import tkinter as tk, os
+import tkinter.font as tkfont
+from corpus import load_corpus
+from glyphs import GlyphCache, bucket_size
+from results import ResultStore
+from keystrokes import KeystrokeRecorder, KeystrokeLog
+from layout import TextLayout
+from render import make_renderer, PENDING, CORRECT, WRONG
+from cursor import CursorAnimator
+from hud import Hud
+from worker import Worker
+from profiler import Profiler, ProfileOverlay
+from session import TypingSession
+import setting
 
 def resource_path(relative_path):  #get absolute path
     return os.path.join(os.path.abspath("."), relative_path)
 
 class TypingTestApp:
-    def __init__(self, root):
+    def __init__(self, root, startup=None, profiler=None):
         self.root = root
+        self.startup = startup or StartupTimer(False)
+        self.profiler = profiler or Profiler(False)  #Times the hot path when --profile is given, see profiler.py
         self.root.geometry("1280x720") #Window geometry
         self.root.minsize(800, 400)
-        self.sentence = self.get_sentence()
-        self.char_dict = self.create_char_dict()  #Create character dictionary
-        self.current_index = 0
-        self.start_time, self.original_image, self.result_label, self.restart_button = None, None, None, None
+        self.ready, self.loading = False, False  #Heavy setup runs after the window is on screen
+        self.long_form = False  #Button 3: scrolling test over a whole article
+        self.practice_mode, self.practice, self.practice_index = False, None, None  #Button 5: passages rich in the n-grams you miss
+        self.renderer, self.session = None, None
+        self.current_char, self.result_label, self.restart_button = None, None, None
+        self.photo = None  #PhotoImage currently shown by image_label
+        self.pending, self.render_id = {}, None  #Marks waiting for the next render_pending, index -> state
+        self.glyph_size = bucket_size(min(setting.WIDTH, setting.HEIGHT - 84) * 0.3)
+        self.window_size, self.resize_after_id = None, None
         self.last_button = 2
-        self.red_line_id = None
-        self.flicker_state = 0
-        self.flicker_after_id = None  # New: Track the after() ID
+        self.worker = Worker(self.root)  #Every disk write and history load runs here, see worker.py
+        self.cursor = CursorAnimator(self.root, lambda color: self.renderer.cursor_color(color))  #Single flicker loop for the app's lifetime, see cursor.py
 
         #Configure grids
         self.root.columnconfigure(0, weight=1)
@@ -48,6 +46,9 @@ class TypingTestApp:
         self.top_frame.grid(row=0, column=0, sticky="ew")
         self.top_frame.grid_propagate(False)
         self.create_buttons()
+        self.hud_label = tk.Label(self.top_frame, bg="#5D3E69", fg="#C894DC", font=("Arial", 14), justify="left")  #Between buttons 3 and 4
+        self.hud_label.place(x=430, y=0, width=240, height=84)
+        self.hud = Hud(self.root, lambda text: self.hud_label.config(text=text), lambda: self.session, setting.HUD_FPS)  #Live WPM/accuracy, repainted at HUD_FPS, see hud.py
 
         #Configure main content frame and content
         self.main_frame = tk.Frame(root, bg="#373441")
@@ -55,13 +56,52 @@ class TypingTestApp:
         self.text_frame = tk.Frame(self.main_frame, bg="#373441")  # Frame for text display
         self.text_frame.place(relx=0.5, rely=0.5, anchor="center")
         self.show_image()
+        self.startup.mark('window built')
+        self.root.bind("<Map>", self.on_map)
+        self.start_profiling()
+
+    def start_profiling(self):  #Wrap the hot-path methods and show rolling latencies, nothing happens when disabled
+        if not self.profiler.enabled:
+            return
+        self.profiler.instrument(self)
+        overlay_label = tk.Label(self.main_frame, bg="#373441", fg="#BEA8C7", font=("Courier", 10), justify="left")
+        overlay_label.place(relx=1.0, rely=0.0, anchor="ne")
+        ProfileOverlay(self.root, lambda text: overlay_label.config(text=text), self.profiler).start()
+
+    def on_map(self, event):  #Window is on screen, give it a moment to paint then load the rest
+        if event.widget is self.root and not self.loading:
+            self.loading = True
+            self.startup.mark('window mapped')
+            self.root.after(10, self.finish_startup)
+
+    def finish_startup(self):  #Everything that touches the disk or decodes images
+        self.corpus = load_corpus(resource_path(setting.CORPUS_PATH))  #Parsed once, shared by every restart
+        self.startup.mark('corpus')
+        self.results = ResultStore(resource_path(setting.RESULTS_PATH), resource_path('./data.json'),
+                                   resource_path(setting.TABLE_PATH), repair=False)  #Saved stats only, a stale or missing copy is rebuilt by repair() on the worker
+        self.worker.call(self.results.repair)  #First job, so every append and stats read comes after it
+        self.keystroke_log = KeystrokeLog(resource_path(setting.KEYSTROKES_PATH))
+        self.recorder = KeystrokeRecorder()  #Every key press and backspace of the current test
+        self.startup.mark('results')
+        self.glyphs = GlyphCache(resource_path('content'))  #Letter images decoded once
+        self.startup.mark('glyphs')
+        self.text_font = tkfont.Font(family="Arial", size=25, weight="bold")  # Font for text
+        self.text_layout = TextLayout(self.text_font)  #Glyph widths measured once per char
+        self.sentence = self.get_sentence()
+        self.session = self.create_session()  #Typing state and scoring, see session.py
         self.create_text_grid()  # Create text display grid
+        self.startup.mark('first passage')
 
         #Configure keys and events
         self.root.bind("<Key>", self.handle_key_press)  # Key summons an event
         self.root.bind("<BackSpace>", self.handle_backspace)  # Backspace handling
-        self.root.bind("<Configure>", self.resize_image)  #Resize event
+        self.root.bind("<Configure>", self.on_configure)  #Resize event
         self.root.bind("<Return>", lambda event: self.restart() if self.restart_button else None)  #Enter restarts
+        self.cursor.start()
+        self.hud.start()
+        self.ready = True
+        self.startup.mark('ready')
+        self.startup.finish()
 
     def create_buttons(self):   #Set up buttons
         button_style = {
@@ -86,206 +126,187 @@ class TypingTestApp:
                   command=lambda: self.button_press(5)).place(x=1196, y=0, width=84, height=84)
 
     def button_press(self, number): #Button press event
+        if not self.ready:
+            return
         if number == 1 and self.last_button != 1:
             self.destroy_menu(self.last_button)
             self.last_button = 1
-            data = open_json(resource_path('./data.json'))
-            avgwpm = sum(data[i]['wpm'] for i in data) / len(data)
-            avgcpm = sum(data[i]['cpm'] for i in data) / len(data)
-            avgaccuracy = sum(data[i]['accuracy'] for i in data) / len(data)
-            #CREATE A AVG SESH HERE
-            print(f'Average WPM: {avgwpm}\n Average CPM: {avgcpm}\nAverage Accuracy: {avgaccuracy}')
+            self.worker.call(self.stats_report, print)  #Built off the Tk thread, after any queued writes
+
 
         elif number == 2 and self.last_button != 2: #Start test on button 2
+            self.long_form, self.practice_mode = False, False
             self.restart()
             self.last_button = 2
-        elif number == 3:
-            self.destroy_menu(self.last_button)
+        elif number == 3 and self.last_button != 3:  #Long-form test on button 3
+            self.long_form, self.practice_mode = True, False
+            self.restart()
             self.last_button = 3
         elif number == 4:
             self.destroy_menu(self.last_button)
             self.last_button = 4
-        elif number == 5:
-            self.destroy_menu(self.last_button)
+        elif number == 5 and self.last_button != 5:  #Weak-spot practice on button 5
+            self.long_form, self.practice_mode = False, True
+            self.start_practice()
+            self.restart()
             self.last_button = 5
 
+    def stats_report(self):  #Runs on the worker
+        stats = self.results.stats  #Kept up to date by every append, no history scan
+        avgwpm, avgcpm, avgaccuracy = stats.mean('wpm'), stats.mean('cpm'), stats.mean('accuracy')
+        #CREATE A AVG SESH HERE
+        lines = [f'Average WPM: {avgwpm}\n Average CPM: {avgcpm}\nAverage Accuracy: {avgaccuracy}']
+        for difficulty in self.corpus.difficulties:  #Straight off the memory-mapped columns
+            summary = self.results.table.summary('wpm', difficulty=difficulty)
+            if summary['count']:
+                lines.append(f"{difficulty}: {summary['count']} tests, median WPM {summary['p50']:.0f}, p90 {summary['p90']:.0f}")
+        from analytics import Analytics  #NumPy is only imported when the stats are opened
+        lines.append(Analytics.load(resource_path(setting.KEYSTROKES_PATH)).report())  #Per-key / bigram breakdown
+        return '\n'.join(lines)
+
     def show_image(self):
         self.image_label = tk.Label(self.main_frame, bg="#373441")  # Label for current letter image
         self.image_label.place(relx=0.0, rely=1.0, anchor="sw")  # Stick to bottom left (relative positioning)
 
-    def create_char_dict(self):  #Create dict for sentence characters
-        char_dict = {}
-        for i, char in enumerate(self.sentence):
-            char_dict[i] = [char, False, None, True]  # [char, correct?, canvas_id, clean]
-        #print("Character Dictionary:", {k: v[0] for k, v in char_dict.items()})  #For my stuf
-        return char_dict
+    def create_session(self):  #Typing state for the current sentence
+        return TypingSession(self.sentence, self.recorder)
+
+    @property
+    def current_index(self):  #Cursor position, owned by the session
+        return self.session.index
 
     def get_sentence(self):  #Get sentence
-        difficulty = ''.join([i for i in random.choice(['simple', 'medium', 'hard']) if not i.isdigit()]).lower()
-        return open_json(resource_path("garbage - Copy.json"))[f'{difficulty}_{random.randint(1, 33)}']  # Line 5: Load sentence from JSON
+        if self.long_form:
+            self.passage_id = None
+            return self.long_form_text()
+        if self.practice_mode and self.practice is not None:
+            pid = self.practice.pick()  #None until there are keystrokes to learn from
+            if pid is not None:
+                self.passage_id = pid
+                return self.corpus.passage(pid)
+        self.passage_id = self.corpus.pick()  #Random difficulty, then random passage of that difficulty
+        return self.corpus.passage(self.passage_id)
+
+    def start_practice(self):  #Loaded on the worker, random passages are used until it is ready
+        self.worker.call(self.load_practice, self.set_practice)
+
+    def load_practice(self):  #Error rates from the keystroke log, passages from the n-gram index
+        from analytics import Analytics
+        from practice import Practice, load_index, weak_grams
+        if self.practice_index is None:  #Mapped from <corpus>.ngrams when buildcorpus.py wrote one
+            self.practice_index = load_index(self.corpus, resource_path(setting.CORPUS_PATH))
+        return Practice(self.corpus, self.practice_index, weak_grams(Analytics.load(resource_path(setting.KEYSTROKES_PATH))))
+
+    def set_practice(self, practice):
+        self.practice = practice
+
+    def long_form_text(self):  #Whole article for the long-form test, whitespace folded to single spaces
+        try:
+            with open(resource_path(setting.LONG_FORM_PATH), 'r', encoding='utf-8') as file:
+                return ' '.join(file.read().split())
+        except FileNotFoundError:
+            return ' '.join(self.corpus.sample() for _ in range(setting.LONG_FORM_PASSAGES))
 
     def create_text_grid(self):  #Create text grid
-        self.canvas = tk.Canvas(self.text_frame, bg="#373441", highlightthickness=0)
-        self.canvas.pack()
-
-        words = self.sentence.split()
-        current_x, current_y = 0, 0
-        char_index = 0
-        max_width = 1000  # Maximum width before wrapping
-        font = ("Arial", 25, "bold")  # Font for text
-
-        for word in words:
-            word_width = len(word) * 25
-            if current_x + word_width > max_width:
-                current_x = 0
-                current_y += 30
-
-            for char in word:
-                text_id = self.canvas.create_text(current_x, current_y,
-                                                  text=char, font=font, anchor="nw", fill="#BEA8C7")
-                self.char_dict[char_index][2] = text_id
-                bbox = self.canvas.bbox(text_id)  # Get bounding box of text
-                char_width = bbox[2] - bbox[0]
-                current_x += char_width + 2
-                char_index += 1
-
-            if char_index < len(self.sentence):
-                text_id = self.canvas.create_text(current_x, current_y,
-                                                  text=" ", font=font, anchor="nw", fill="#BEA8C7")
-                self.char_dict[char_index][2] = text_id
-                current_x += 10
-                char_index += 1
-
-        self.canvas.update()  # Update canvas to calculate bounds
-        canvas_width = self.canvas.bbox("all")[2]
-        canvas_height = self.canvas.bbox("all")[3] + 20
-        self.canvas.config(width=canvas_width, height=canvas_height)  # Set canvas size
-
-        self.update_letter_image()  #Update image
+        kind = 'virtual' if self.long_form else setting.RENDERER  #Long passages only get items for the visible lines
+        self.pending.clear()  #They belong to the previous passage
+        self.renderer = make_renderer(kind, self.text_frame, self.text_font, self.text_layout)
+        self.renderer.draw(self.sentence, self.text_width())  #Canvas items or a Text widget, see render.py
+
+        self.update_letter_image()
         self.update_red_line()
 
+    def text_width(self):  #Wrap width for the passage, follows the window
+        window_width = self.root.winfo_width()
+        if window_width <= 1:  #Not mapped yet
+            window_width = setting.WIDTH
+        return max(400, int(window_width * 0.8))
+
+    def reflow_text(self):  #Re-wrap the passage to the current window width
+        if self.renderer.reflow(self.text_width()):
+            self.update_red_line()
+
     def update_letter_image(self):  #Update current letter image
         if self.current_index < len(self.sentence):
-            char = self.sentence[self.current_index].lower()
-            try:
-                self.original_image = Image.open(f"./content/{char}.png")  # Load image file
-                self.resize_image()
-            except FileNotFoundError:
-                self.image_label.config(image="")
+            self.current_char = self.sentence[self.current_index].lower()
+            self.show_letter_image()
+
+    def on_configure(self, event):  #Coalesce a burst of root resizes into one resize_image call
+        if event.widget is not self.root or (event.width, event.height) == self.window_size:
+            return  #Child widget or a plain move
+        self.window_size = (event.width, event.height)
+        if self.resize_after_id is not None:
+            self.root.after_cancel(self.resize_after_id)
+        self.resize_after_id = self.root.after(setting.RESIZE_DEBOUNCE_MS, self.resize_image)
 
     def resize_image(self, event=None):  #Resize letter image on window resize
-        if self.original_image:
-            window_width = self.root.winfo_width()  # Get current window width
-            window_height = self.root.winfo_height() - 84
-            min_dimension = min(window_width, window_height)
-            new_size = int(min_dimension * 0.3)  #10% of smallest dimension
-            if new_size < 32:  #Enforce minimum size
-                new_size = 32
-            resized_img = self.original_image.resize((new_size, new_size), Image.Resampling.LANCZOS)
-            self.photo = ImageTk.PhotoImage(resized_img)
-            self.image_label.config(image=self.photo)  #Update label with new image
+        self.resize_after_id = None
+        window_width = self.root.winfo_width()  # Get current window width
+        window_height = self.root.winfo_height() - 84
+        min_dimension = min(window_width, window_height)
+        self.glyph_size = bucket_size(min_dimension * 0.3)  #30% of smallest dimension, snapped to a bucket
+        self.show_letter_image()
+        self.reflow_text()
+
+    def show_letter_image(self):
+        if self.current_char and self.image_label:
+            photo = self.glyphs.get(self.current_char, self.glyph_size)  #Cached, only resampled on first use
+            if photo is not self.photo:  #Only swap the label's image reference
+                self.photo = photo
+                self.image_label.config(image=photo or "")
 
     def update_red_line(self):  # Update position of indicator
-        if self.red_line_id:
-            self.canvas.delete(self.red_line_id)
-            # New: Cancel any existing flicker loop
-            if self.flicker_after_id is not None:
-                self.root.after_cancel(self.flicker_after_id)
-                self.flicker_after_id = None
-
-        if self.current_index < len(self.sentence):
-            text_id = self.char_dict[self.current_index][2]
-            bbox = self.canvas.bbox(text_id)
-            if bbox:
-                x1, y1, x2, y2 = bbox
-                width = x2 - x1
-
-                # Create solid rectangle without outline, 3px height
-                self.red_line_id = self.canvas.create_rectangle(
-                    x1, y2 - 6, x1 + width, y2-3,
-                    fill="#B026E7",  # Initial color
-                    outline="",
-                    tags="red_line"
-                )
-                self.canvas.lift(self.red_line_id)
-                self.flicker_red_line()  # Start flickering
-
-    def flicker_red_line(self):  #Handle indicator
-        if self.red_line_id:
-            steps = 200  # Increased steps for smoother transition
-            self.flicker_state = (self.flicker_state + 1) % (steps * 2)  # Cycle 0 to 39
-
-            # Calculate intensity (0 to 1 and back)
-            if self.flicker_state < steps:
-                intensity = self.flicker_state / steps  # Fade from dark to purple
-            else:
-                intensity = (steps * 2 - self.flicker_state) / steps  # Fade from purple to dark
-
-            # Define the two colors in RGB
-            color1 = (0x37, 0x34, 0x41)  # #373441 (dark gray)
-            color2 = (0xB0, 0x26, 0xE7)  # #B026E7 (purple)
-
-            #Interpolate between the two colors
-            r = int(color1[0] + (color2[0] - color1[0]) * intensity)
-            g = int(color1[1] + (color2[1] - color1[1]) * intensity)
-            b = int(color1[2] + (color2[2] - color1[2]) * intensity)
-
-            #Format as hex color
-            color = f"#{r:02x}{g:02x}{b:02x}"
-
-            self.canvas.itemconfig(self.red_line_id, fill=color)
-            #New: Store the after ID and schedule next update
-            self.flicker_after_id = self.root.after(50, self.flicker_red_line)
+        self.cursor.visible = self.renderer.show_cursor(self.current_index)  #Moved in place, the flicker tick keeps running
 
     def handle_key_press(self, event):  #Handle typing input
-        if self.current_index >= len(self.char_dict) or event.char == '':
+        index = self.current_index
+        correct = self.session.feed(event.char)  #None if finished or not a character
+        if correct is None:
             return
-        if self.start_time is None:  #Start timer on first key
-            self.start_time = time.time()
-
-        expected_char = self.char_dict[self.current_index][0]
-        #print(f'{event.char} Pressed. {expected_char} expected.')
-        if event.char == expected_char:  #Correct key pressed
-            self.char_dict[self.current_index][1] = True
-            self.canvas.itemconfig(self.char_dict[self.current_index][2], fill="green")
-        else:  #Wrong key pressed
-            self.char_dict[self.current_index][1] = False
-            self.canvas.itemconfig(self.char_dict[self.current_index][2], fill="red")
-
-        self.current_index += 1  #Move to next character
-        self.update_letter_image()
-        self.update_red_line()
+        self.pending[index] = CORRECT if correct else WRONG  #Model only, drawing waits for the idle render
+        self.schedule_render()
 
-        if self.current_index == len(self.char_dict):  #End test if last character
+        if self.session.finished:  #End test if last character
+            self.render_pending()  #Draw the last key before the result screen
             self.show_results()
 
     def handle_backspace(self, event):  #Handle backspace
-        if self.current_index > 0:
-            self.current_index -= 1
-            self.char_dict[self.current_index][1] = False
-            self.char_dict[self.current_index][3] = False
-            self.canvas.itemconfig(self.char_dict[self.current_index][2], fill="#BEA8C7")  #Reset color
-            self.update_letter_image()  #Update image
-            self.update_red_line()  #Update indicator
+        index = self.session.backspace()
+        if index is not None:
+            self.pending[index] = PENDING  #Reset color on the next render
+            self.schedule_render()
+
+    def schedule_render(self):  #One render per burst of keys, run when Tk is idle
+        if self.render_id is None:
+            self.render_id = self.root.after_idle(self.render_pending)
+
+    def render_pending(self):  #Apply every queued mark, then one glyph and one cursor move
+        if self.render_id is not None:
+            self.root.after_cancel(self.render_id)
+            self.render_id = None
+        for index, state in self.pending.items():
+            self.renderer.mark(index, state)
+        self.pending.clear()
+        self.update_letter_image()
+        self.update_red_line()
 
     def show_results(self):  #Display results
-        end_time = time.time()
-        elapsed_minutes = (end_time - self.start_time) / 60 if self.start_time else 0
-
-        correct = sum(1 for char_info in self.char_dict.values() if char_info[1] and char_info[3])
-        total = len(self.char_dict)
-        accuracy = (correct / total) * 100 if total > 0 else 0
-        wpm = (total / 5) / elapsed_minutes if elapsed_minutes > 0 else 0  #WPM
-        cpm = total / elapsed_minutes if elapsed_minutes > 0 else 0  #CPM
+        result = self.session.result()  #Scored by the session, no scan here
+        accuracy, wpm, cpm = result['accuracy'], result['wpm'], result['cpm']
+        correct, total = result['correct'], result['total']
 
         self.text_frame.place(relx=0.5, rely=0, anchor="n")  #Slide text to top
-        data = open_json(resource_path('./data.json'))
-        data[f'{len(data)+1}'] = {
+        self.worker.write(self.results.append_many, {  #Queued, written and fsync'd off the Tk thread
             "wpm":  int(wpm),
             "cpm":  int(cpm),
-            'accuracy': int(accuracy)
-        }
-        dump_json(data, resource_path('./data.json'))
+            'accuracy': int(accuracy),
+            'session': self.recorder.session_id,
+            'passage': self.passage_id,
+            'difficulty': None if self.passage_id is None else self.corpus.difficulty_of(self.passage_id),
+            'elapsed': round(result['elapsed'], 3),
+            'errors': result['errors']
+        })
+        self.worker.write(self.keystroke_log.append_blocks, KeystrokeLog.encode(self.recorder))  #Snapshot now, the recorder is reset on restart
         result_text = (f"Test Complete!\n" #Results
                        f"Accuracy: {accuracy:.2f}%\n"
                        f"WPM: {wpm:.2f}\n"
@@ -310,56 +331,53 @@ class TypingTestApp:
         if self.restart_button:
             self.restart_button.destroy()
             self.restart_button = None
-        self.canvas.destroy()  # Destroy old canvas
+        self.renderer.destroy()  # Destroy old canvas
         self.text_frame.place(relx=0.5, rely=0.5, anchor="center")
         if self.image_label is None:
             self.show_image()
+            self.photo = None
 
         #Reset stuff
-        self.current_index = 0  # Reset typing position
-        self.start_time, self.original_image, self.red_line_id = None, None, None  # Reset everythign
-
-        #Cancel any existing indicator
-        if self.flicker_after_id is not None:
-            self.root.after_cancel(self.flicker_after_id)
-            self.flicker_after_id = None
+        self.recorder.reset()
+        self.current_char, self.cursor.visible = None, False  # Reset everythign
 
         #Create new test
         new_sentence = self.get_sentence()  # Get new sentence
         self.sentence = new_sentence  # Update sentence
-        self.char_dict = self.create_char_dict()  # Recreate dict
+        self.session = self.create_session()  # Fresh typing state
         self.create_text_grid()  # Recreate text grid
 
     def destroy_menu(self, ID): #Destroy current menu's content:, call ID to destroy
         if ID == 1:
             print('there is nothing to destroy')
-        elif ID == 2:
+        elif ID in (2, 3, 5):  #Typing test: normal, long-form or practice
             if self.result_label:
                 self.result_label.destroy()
                 self.result_label = None
             if self.restart_button:
                 self.restart_button.destroy()
                 self.restart_button = None
-            self.canvas.delete("all")  # Clear text grid
+            self.renderer.clear()  # Clear text grid
+            self.pending.clear()  #Marks queued for the cleared passage
 
             #Reset stuff
             self.text_frame.place(relx=0.5, rely=0.5, anchor="center")
-            self.current_index = 0
+            self.session.reset()
             self.image_label.destroy()
-            self.start_time, self.original_image, self.red_line_id, self.image_label = None, None, None, None
+            self.current_char, self.cursor.visible, self.image_label = None, False, None
+            self.photo = None
             self.last_button = 1
-        elif ID == 3:
-            print('there is nothing to destroy')
         elif ID == 4:
             print('there is nothing to destroy')
-        elif ID == 5:
-            print('there is nothing to destroy')
 
 def main():
     root = tk.Tk()
     root.title("BombApp")
-    app = TypingTestApp(root)
+    app = TypingTestApp(root, StartupTimer(budget_ms=setting.STARTUP_BUDGET_MS), Profiler())
     root.mainloop()
+    if app.profiler.enabled:  #Open in chrome://tracing or ui.perfetto.dev
+        print(f'Wrote {app.profiler.export(resource_path(setting.PROFILE_TRACE_PATH))} trace events to {setting.PROFILE_TRACE_PATH}')
+    app.worker.close()  #Flush queued results before exiting
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,267 @@
+import argparse, json, os, platform, random, sys, time, tracemalloc
+from types import SimpleNamespace
+
+import render
+import setting
+from app import TypingTestApp, resource_path
+from corpus import load_corpus
+from cursor import CursorAnimator
+from glyphs import GlyphCache, bucket_size
+from keystrokes import KeystrokeRecorder
+from layout import TextLayout
+from profiler import Profiler
+
+#Keystroke-replay benchmark for the input hot path, runs without a display:
+#the app's real handlers drive stub Tk widgets, glyphs are resized with PIL but never turned into PhotoImages
+#python bench.py --wpm 120 --errors 0.03 --out bench_results.json [--compare old.json]
+
+
+class StubWidget:  #Accepts any Tk call and does nothing
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class StubRoot(StubWidget):
+    def __init__(self):
+        self.after_ids = 0
+        self.idle = []  # after_idle callbacks, run by run_idle() where Tk would go idle
+
+    def winfo_width(self):
+        return setting.WIDTH
+
+    def winfo_height(self):
+        return setting.HEIGHT
+
+    def after(self, ms, func=None, *args):  #Never fires, the cursor tick is not part of the key path
+        self.after_ids += 1
+        return f'after#{self.after_ids}'
+
+    def after_idle(self, func, *args):
+        self.idle.append((func, args))
+        return self.after('idle')
+
+    def run_idle(self):
+        idle, self.idle = self.idle, []
+        for func, args in idle:
+            func(*args)
+
+
+class StubCanvas(StubWidget):  #Keeps item options in a dict so item calls cost roughly what a lookup costs
+    def __init__(self, *args, **kwargs):
+        self.items, self.next_id = {}, 1
+
+    def _create(self, coords, options):
+        item = self.next_id
+        self.next_id += 1
+        self.items[item] = [coords, options]
+        return item
+
+    def create_text(self, *coords, **options):
+        return self._create(coords, options)
+
+    def create_rectangle(self, *coords, **options):
+        return self._create(coords, options)
+
+    def coords(self, item, *coords):
+        self.items[item][0] = coords
+
+    def itemconfig(self, item, **options):
+        self.items[item][1].update(options)
+
+    def delete(self, item):
+        if item == "all":
+            self.items.clear()
+        else:
+            self.items.pop(item, None)
+
+
+class StubFont:  #Deterministic widths instead of Font.measure
+    def measure(self, text):
+        return sum(12 + ord(char) % 9 for char in text)
+
+    def metrics(self, option):
+        return 29
+
+
+class StubGlyphs(GlyphCache):
+    def make_photo(self, image):
+        return image
+
+
+class BenchApp(TypingTestApp):
+    def show_results(self):  #No result screen or disk writes in the benchmark
+        self.finished = True
+
+
+_glyphs = None
+
+
+def build_app(sentence, renderer='canvas'):  #TypingTestApp wired to stubs, skipping the Tk-only parts of __init__
+    global _glyphs
+    if _glyphs is None:
+        _glyphs = StubGlyphs(resource_path('content'))
+    render.tk = SimpleNamespace(Canvas=StubCanvas, Text=None, TclError=Exception)
+    app = BenchApp.__new__(BenchApp)
+    app.root = StubRoot()
+    app.long_form = renderer == 'virtual'
+    app.recorder = KeystrokeRecorder()
+    app.sentence = sentence
+    app.session = app.create_session()
+    app.current_char, app.photo, app.finished = None, None, False
+    app.pending, app.render_id = {}, None
+    app.glyph_size = bucket_size(min(setting.WIDTH, setting.HEIGHT - 84) * 0.3)
+    app.cursor = CursorAnimator(app.root, lambda color: app.renderer.cursor_color(color))
+    app.glyphs = _glyphs
+    app.text_font = StubFont()
+    app.text_layout = TextLayout(app.text_font)
+    app.text_frame, app.image_label = StubWidget(), StubWidget()
+    setting.RENDERER = 'canvas' if renderer == 'virtual' else renderer
+    app.create_text_grid()
+    return app
+
+
+def make_passage(size, seed=0):  #Real corpus sentences joined up to size characters
+    corpus, rng = load_corpus(resource_path(setting.CORPUS_PATH)), random.Random(seed)
+    parts, length = [], 0
+    while length < size:
+        text = corpus.passage(rng.randrange(len(corpus)))
+        parts.append(text)
+        length += len(text) + 1
+    return ' '.join(parts)[:size]
+
+
+def keystream(sentence, wpm, error_rate, seed=0):  #(char or None for backspace, delay in s); typos are fixed at once
+    rng, delay = random.Random(seed), 60 / (wpm * 5)
+    for char in sentence:
+        if rng.random() < error_rate:
+            yield rng.choice('qwertyuiopasdfghjklzxcvbnm'), delay
+            yield None, delay
+        yield char, delay
+
+
+def replay(app, stream, realtime=False, burst=1):  #Per-keystroke time in ns, idle renders included
+    timings, clock = [], time.perf_counter
+    next_at = clock()
+    for n, (char, delay) in enumerate(stream, 1):
+        if realtime:
+            next_at += delay
+            pause = next_at - clock()
+            if pause > 0:
+                time.sleep(pause)
+        event = SimpleNamespace(char=char or '\b')
+        start = time.perf_counter_ns()
+        if char is None:
+            app.handle_backspace(event)
+        else:
+            app.handle_key_press(event)
+        if n % burst == 0:  #Tk goes idle between bursts of burst keys
+            app.root.run_idle()
+        timings.append(time.perf_counter_ns() - start)
+    return timings
+
+
+def allocations(app, stream):  #Net blocks and peak traced bytes per keystroke
+    tracemalloc.start()
+    blocks, peaks, keys = 0, 0, 0
+    for char, _ in stream:
+        event = SimpleNamespace(char=char or '\b')
+        before = sys.getallocatedblocks()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        if char is None:
+            app.handle_backspace(event)
+        else:
+            app.handle_key_press(event)
+        app.root.run_idle()
+        peaks += tracemalloc.get_traced_memory()[1] - base
+        blocks += sys.getallocatedblocks() - before
+        keys += 1
+    tracemalloc.stop()
+    return blocks / max(keys, 1), peaks / max(keys, 1)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] if ordered else 0
+
+
+def bench_keystrokes(size, args):
+    sentence = make_passage(size, args.seed)
+    warm = 'abcdefghijklmnopqrstuvwxyz' + sentence[:64]  #Warm glyph and width caches outside the measurement
+    replay(build_app(warm, args.renderer), keystream(warm, args.wpm, 0))
+    app = build_app(sentence, args.renderer)
+    profiler = Profiler(bool(args.trace))
+    profiler.instrument(app)  #Per-method breakdown for --trace, adds wrapper overhead to the timings
+    timings = replay(app, keystream(sentence, args.wpm, args.errors, args.seed), args.realtime, args.burst)
+    if profiler.enabled:
+        print(profiler.summary())
+        profiler.export(f'{os.path.splitext(args.trace)[0]}_{size}.json')
+    blocks, peak = allocations(build_app(sentence, args.renderer), keystream(sentence, args.wpm, args.errors, args.seed))
+    return {
+        'keys': len(timings),
+        'mean_us': sum(timings) / len(timings) / 1000,
+        'p50_us': percentile(timings, 50) / 1000,
+        'p95_us': percentile(timings, 95) / 1000,
+        'p99_us': percentile(timings, 99) / 1000,
+        'net_blocks_per_key': blocks,
+        'peak_bytes_per_key': peak,
+    }
+
+
+def bench_layout(size, renderer, seed):  #create_text_grid time in ms
+    sentence = make_passage(size, seed)
+    start = time.perf_counter()
+    build_app(sentence, renderer)
+    return (time.perf_counter() - start) * 1000
+
+
+def compare(old, new):  #Ratio new/old per passage size, > 1 means slower
+    for size, row in new['keystroke'].items():
+        before = old.get('keystroke', {}).get(size)
+        if before:
+            print(f'{size:>8} chars  p50 x{row["p50_us"] / before["p50_us"]:.2f}  p99 x{row["p99_us"] / before["p99_us"]:.2f}')
+    for renderer, sizes in new['layout'].items():
+        for size, ms in sizes.items():
+            before = old.get('layout', {}).get(renderer, {}).get(size)
+            if before:
+                print(f'{renderer:>8} layout {size:>7} chars  x{ms / before:.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay synthetic keystrokes against the typing test without a display')
+    parser.add_argument('--wpm', type=float, default=120)
+    parser.add_argument('--errors', type=float, default=0.03, help='Typo rate, each typo is followed by a backspace')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--layout-sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--renderer', choices=['canvas', 'virtual'], default='canvas')
+    parser.add_argument('--realtime', action='store_true', help='Pace keys at the requested WPM')
+    parser.add_argument('--burst', type=int, default=1, help='Keys delivered before Tk gets to idle, e.g. key rollover')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    parser.add_argument('--trace', help='Profile the handlers and write Chrome traces as <trace>_<size>.json')
+    args = parser.parse_args()
+
+    results = {
+        'meta': {'time': time.time(), 'python': platform.python_version(), 'wpm': args.wpm,
+                 'errors': args.errors, 'renderer': args.renderer, 'burst': args.burst},
+        'keystroke': {},
+        'layout': {'canvas': {}, 'virtual': {}},
+    }
+    for size in args.sizes:
+        row = results['keystroke'][str(size)] = bench_keystrokes(size, args)
+        print(f'{size:>8} chars  p50 {row["p50_us"]:.1f}us  p95 {row["p95_us"]:.1f}us  p99 {row["p99_us"]:.1f}us  '
+              f'{row["net_blocks_per_key"]:.2f} blocks/key  {row["peak_bytes_per_key"]:.0f} B peak/key')
+    for renderer in results['layout']:
+        for size in args.layout_sizes:
+            ms = results['layout'][renderer][str(size)] = bench_layout(size, renderer, args.seed)
+            print(f'{renderer:>8} layout {size:>7} chars  {ms:.1f}ms')
+    with open(args.out, 'w') as file:
+        json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), results)
+
+
+if __name__ == "__main__":
+    main()
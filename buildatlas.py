@@ -0,0 +1,60 @@
+import argparse, json, os, time
+
+from glyphs import ATLAS_INDEX, SIZE_BUCKETS
+
+#Asset build step: every letter PNG in content/ is resampled once per size bucket and packed into one atlas image
+#The atlas is raw RGBA so the app can memory-map it instead of decoding it; the index maps char -> size -> [x, y]
+#GlyphCache crops from the atlas at run time and never resamples
+#python buildatlas.py [content] [--width 2048]
+
+
+def pack(sizes, count, width):  #Shelf packing: (size, slot) -> (x, y), rows of equal-size glyphs, height of the atlas
+    places, y = {}, 0
+    for size in sorted(sizes, reverse=True):
+        x = 0
+        for slot in range(count):
+            if x + size > width:
+                x, y = 0, y + size
+            places[size, slot] = (x, y)
+            x += size
+        y += size
+    return places, y
+
+
+def build_atlas(folder, sizes=SIZE_BUCKETS, width=2048, image_name='glyphs.atlas.rgba'):
+    from PIL import Image
+    chars, originals = [], []
+    for name in sorted(os.listdir(folder)):
+        char, ext = os.path.splitext(name)
+        if ext.lower() == '.png' and len(char) == 1:
+            with Image.open(os.path.join(folder, name)) as image:
+                originals.append(image.convert('RGBA'))
+            chars.append(char.lower())
+    places, height = pack(sizes, len(chars), max(width, max(sizes)))
+    atlas = Image.new('RGBA', (max(width, max(sizes)), height), (0, 0, 0, 0))
+    index = {'image': image_name, 'width': atlas.width, 'height': atlas.height, 'sizes': list(sizes),
+             'glyphs': {char: {} for char in chars}}
+    for size in sizes:
+        for slot, (char, original) in enumerate(zip(chars, originals)):
+            x, y = places[size, slot]
+            atlas.paste(original.resize((size, size), Image.Resampling.LANCZOS), (x, y))
+            index['glyphs'][char][str(size)] = [x, y]
+    with open(os.path.join(folder, image_name), 'wb') as file:
+        file.write(atlas.tobytes())
+    with open(os.path.join(folder, ATLAS_INDEX), 'w', encoding='utf-8') as file:  #Written last, it marks the atlas as built
+        json.dump(index, file, separators=(',', ':'))
+    return len(chars), atlas.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack the letter images into a multi-size atlas')
+    parser.add_argument('folder', nargs='?', default='content')
+    parser.add_argument('--width', type=int, default=2048, help='Atlas width in pixels')
+    args = parser.parse_args()
+    start = time.perf_counter()
+    count, (width, height) = build_atlas(args.folder, width=args.width)
+    print(f'Packed {count} glyphs at {len(SIZE_BUCKETS)} sizes into {width}x{height} in {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == "__main__":
+    main()
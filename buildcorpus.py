@@ -0,0 +1,245 @@
+import argparse, hashlib, json, os, re, struct, time, zlib
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from operator import truediv
+
+from corpus import MappedCorpus, write_mapped
+from practice import grams, index_path, write_index
+
+#Corpus builder: streams plain-text (or old JSON) sources into a corpus index that load_corpus maps directly
+#Sources are read line by line, deduplicated by sentence hash, packed into passages and scored in a process pool
+#Each JSON value is one passage, never joined with the next one
+#Passages are spooled to disk while scoring, then split into simple/medium/hard by score terciles
+#The n-gram index for practice mode is written alongside (<out>.ngrams): grams are counted in the pool,
+#spilled to one file per gram partition, then each partition is merged in the pool and streamed into the index
+#python buildcorpus.py corpus.bin book1.txt book2.txt "garbage - Copy.json" [--workers 8]
+
+LEVELS = ('simple', 'medium', 'hard')
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+PARTITIONS = 64  # Spill files for the n-gram index, each is merged on its own
+_POSTINGS = struct.Struct('<I')  # Spill chunk entry: gram length byte, gram, count, then ids, counts, sort keys
+COMMON_BIGRAMS = frozenset(  # Most frequent English letter pairs, anything else counts as rare
+    'th he in er an re on at en nd ti es or te of ed is it al ar st to nt ng se ha as ou io le ve co me de hi ri ro '
+    'ic ne ea ra ce li ch ll be ma si om ur ca el ta la ns di fo ho pe ec pr no ct us ac ot il tr ly nc et ut ss so '
+    'rs un lo wa ge ie wh ee wi em ad ol rt po we na ul ni ts mo ow pa im mi ai sh ir su id os iv ia am fi ci vi pl '
+    'ig tu ev ld ry mp fe bl ab gh ty op wo sa ay ex ke fr oo av ag if ap gr od bo sp rd do uc bu ei ov by rm ep tt '
+    'oc fa ef cu rn sc gi da yo cr cl du ga qu ue ff ba ey ls va um pp ua up lu go ht ru ug ds lt pi rc rr eg au ck '
+    'ew mu br bi pt ak pu ui rg ib tl ny ki rk ys ob mm fu ph og ms ye ud mb ip ub oi rl gu dr hr cc tw ft wn nu af '
+    'hu nn eo vo rv nf xp gn sm fl iz ok nl my gl aw ju oa eq sy sl ps jo lf nv je nk kn gs dy hy ze ks xt bs'.split())
+
+
+def digest(text):  #8 byte hash of the case- and space-folded text
+    return hashlib.blake2b(' '.join(text.lower().split()).encode('utf-8'), digest_size=8).digest()
+
+
+def paragraphs(values):  #JSON values with a paragraph break after each, so none is packed with the next
+    for value in values:
+        yield value
+        yield ''
+
+
+def read_passages(paths, min_chars=40, max_chars=200):  #Passages of every source, no sentence used twice
+    seen = set()
+    for path in paths:
+        if path.endswith('.json'):  #Old corpus format, every value is already a short passage
+            with open(path, 'r', encoding='utf-8') as file:
+                values = json.load(file).values()
+            yield from split_passages(paragraphs(values), 1, max_chars, seen)
+            continue
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            yield from split_passages(file, min_chars, max_chars, seen)
+
+
+def split_passages(lines, min_chars=40, max_chars=200, seen=None):  #Whole sentences packed into passages of min..max chars
+    seen = set() if seen is None else seen  # Digests of sentences already used, repeats are dropped before packing
+    parts, size = [], 0
+    for line in lines:
+        text = ' '.join(line.split())
+        if not text:  #Paragraph break, never join across it
+            if size >= min_chars:
+                yield ' '.join(parts)
+            parts, size = [], 0
+            continue
+        for sentence in SENTENCE_END.split(text):
+            if len(sentence) > max_chars:  #Run-on sentence, skip it rather than cut it mid-word
+                continue
+            key = digest(sentence)
+            if key in seen:
+                continue
+            seen.add(key)
+            if size and size + 1 + len(sentence) > max_chars:
+                if size >= min_chars:
+                    yield ' '.join(parts)
+                parts, size = [], 0
+            parts.append(sentence)
+            size += len(sentence) + (size > 0)
+    if size >= min_chars:
+        yield ' '.join(parts)
+
+
+def score(text):  #Higher is harder: long words, punctuation/digits/capitals and rare letter pairs
+    words = text.split()
+    if not words:
+        return 0.0
+    word_length = sum(map(len, words)) / len(words)
+    symbols = sum(1 for char in text if not (char.islower() or char == ' '))
+    pairs = rare = 0
+    lower = text.lower()
+    for a, b in zip(lower, lower[1:]):
+        if a.isalpha() and b.isalpha():
+            pairs += 1
+            rare += a + b not in COMMON_BIGRAMS
+    return word_length + 20 * symbols / len(text) + 10 * (rare / pairs if pairs else 0)
+
+
+def score_batch(batch):
+    return [score(text) for text in batch]
+
+
+def batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def in_order(pool, func, jobs, limit):  #(job, func(job)) in job order, at most limit jobs in flight
+    pending = deque()
+    for job in jobs:
+        pending.append((job, pool.submit(func, job)))
+        if len(pending) >= limit:
+            job, future = pending.popleft()
+            yield job, future.result()
+    while pending:
+        job, future = pending.popleft()
+        yield job, future.result()
+
+
+def scored(passages, workers=None, batch_size=2000):  #(text, score) in input order, at most 2 batches per worker in flight
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as pool:
+        for batch, values in in_order(pool, score_batch, batches(passages, batch_size), 2 * workers):
+            yield from zip(batch, values)
+
+
+def count_grams(job):  #Pool job: postings of passages start..end of the corpus, one spill chunk per partition
+    corpus_path, start, end, partitions = job
+    corpus = MappedCorpus(corpus_path)
+    postings, lengths = {}, {}  # gram -> (ids, counts); id -> passage length
+    for pid in range(start, end):
+        text = corpus.passage(pid)
+        lengths[pid] = max(len(text), 1)
+        for gram, count in grams(text).items():
+            entry = postings.get(gram)
+            if entry is None:
+                entry = postings[gram] = (array('I'), array('H'))
+            entry[0].append(pid)
+            entry[1].append(count if count <= 0xFFFF else 0xFFFF)
+    corpus.close()
+    chunks = [[] for _ in range(partitions)]
+    for gram, (ids, counts) in postings.items():
+        keys = array('d', map(truediv, counts, map(lengths.__getitem__, ids)))  # The density NgramIndex.build sorts by
+        name = gram.encode('utf-8')
+        chunks[zlib.crc32(name) % partitions].append(
+            bytes([len(name)]) + name + _POSTINGS.pack(len(ids)) + ids.tobytes() + counts.tobytes() + keys.tobytes())
+    return [b''.join(chunk) for chunk in chunks]
+
+
+def merge_partition(path):  #Pool job: one spill file as densest-first (gram, ids, counts), like NgramIndex.build
+    with open(path, 'rb') as file:
+        data = file.read()
+    os.remove(path)
+    merged, pos = {}, 0
+    while pos < len(data):
+        size = data[pos]
+        gram = data[pos + 1:pos + 1 + size].decode('utf-8')
+        count = _POSTINGS.unpack_from(data, pos + 1 + size)[0]
+        pos += 1 + size + _POSTINGS.size
+        if gram not in merged:
+            merged[gram] = (array('I'), array('H'), array('d'))
+        ids, counts, keys = merged[gram]
+        ids.frombytes(data[pos:pos + 4 * count])
+        counts.frombytes(data[pos + 4 * count:pos + 6 * count])
+        keys.frombytes(data[pos + 6 * count:pos + 14 * count])
+        pos += 14 * count
+    postings = []
+    for gram, (ids, counts, keys) in merged.items():
+        order = sorted(range(len(ids)), key=keys.__getitem__, reverse=True)  # Densest first, ties stay in id order
+        postings.append((gram, array('I', map(ids.__getitem__, order)), array('H', map(counts.__getitem__, order))))
+    return postings
+
+
+def build_index(corpus_path, path, workers=None, batch_size=2000, partitions=PARTITIONS):  #N-gram index of a built corpus
+    corpus = MappedCorpus(corpus_path)
+    count = len(corpus)
+    corpus.close()
+    workers = workers or os.cpu_count() or 1
+    spills = [f'{path}.part{i}' for i in range(partitions)]
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            jobs = ((corpus_path, start, min(start + batch_size, count), partitions) for start in range(0, count, batch_size))
+            files = [open(spill, 'wb') for spill in spills]
+            try:
+                for _, chunks in in_order(pool, count_grams, jobs, 2 * workers):  #Appended in id order
+                    for file, chunk in zip(files, chunks):
+                        file.write(chunk)
+            finally:
+                for file in files:
+                    file.close()
+            merged = in_order(pool, merge_partition, spills, 2 * workers)
+            write_index((posting for _, postings in merged for posting in postings), path)
+    finally:
+        for spill in spills:
+            if os.path.exists(spill):
+                os.remove(spill)
+
+
+def build(sources, out, min_chars=40, max_chars=200, workers=None):
+    spool = f'{out}.passages'
+    scores = array('f')
+    try:
+        with open(spool, 'w', encoding='utf-8') as file:  #One passage per line, they contain no newlines
+            for text, value in scored(read_passages(sources, min_chars, max_chars), workers):
+                file.write(text + '\n')
+                scores.append(value)
+        ordered = sorted(scores)
+        cuts = [ordered[len(ordered) * i // len(LEVELS)] for i in range(1, len(LEVELS))] if ordered else []
+
+        def level(value):
+            return sum(value >= cut for cut in cuts)
+
+        def group(target):  #Re-reads the spool once per difficulty
+            with open(spool, 'r', encoding='utf-8') as file:
+                for line, value in zip(file, scores):
+                    if level(value) == target:
+                        yield line[:-1]
+
+        write_mapped({name: group(i) for i, name in enumerate(LEVELS)}, out)
+        build_index(out, index_path(out), workers)
+    finally:
+        if os.path.exists(spool):
+            os.remove(spool)
+    return len(scores), cuts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a corpus index from plain-text or JSON sources')
+    parser.add_argument('out')
+    parser.add_argument('sources', nargs='+')
+    parser.add_argument('--min', type=int, default=40, help='Shortest passage in characters')
+    parser.add_argument('--max', type=int, default=200, help='Longest passage in characters')
+    parser.add_argument('--workers', type=int, default=None, help='Scoring processes, default one per core')
+    args = parser.parse_args()
+    start = time.perf_counter()
+    count, cuts = build(args.sources, args.out, args.min, args.max, args.workers)
+    print(f'Wrote {count} passages to {args.out} in {time.perf_counter() - start:.1f}s, '
+          f'difficulty cut-offs {", ".join(f"{cut:.2f}" for cut in cuts)}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#Stats charts: the three figures are built once and only their line data changes afterwards
+#matplotlib is imported when the first StatsCharts is created, not at startup
+#Long histories are downsampled (history.lttb) so each redraw plots at most budget points per line
+#With period 'day' or 'week' the lines show one mean per period instead of one point per session
+
+BG = "#373441"
+METRICS = (("wpm", "Words Per Minute"), ("cpm", "Characters Per Minute"), ("accuracy", "Accuracy"))
+
+
+class StatsCharts:
+    def __init__(self, parent, column=2, budget=300, window=10, period=None):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        self.values = {metric: [] for metric, _ in METRICS}  # Full history per metric, oldest first
+        self.times = []  # Result timestamps, NaN for results without one
+        self.budget, self.window = budget, window  # Points per line, points per moving average
+        self.period = period  # None (per session), 'day' or 'week'
+        self.lines, self.trends, self.axes, self.canvases = {}, {}, {}, {}
+        self.dirty = False
+        for row, (metric, title) in enumerate(METRICS):
+            figure = Figure(figsize=(5, 2), dpi=100, facecolor=BG)
+            ax = figure.add_subplot(111)
+            self.lines[metric], = ax.plot([], [], color='pink', linewidth=2)
+            self.trends[metric], = ax.plot([], [], color='#C894DC', linewidth=1)
+            ax.set_title(title, color="#C894DC")
+            ax.set_facecolor(BG)
+            ax.grid(color='purple', linestyle='--')
+            canvas = FigureCanvasTkAgg(figure, parent)
+            canvas.get_tk_widget().grid(row=row, column=column)
+            self.axes[metric], self.canvases[metric] = ax, canvas
+
+    def set_history(self, records):  #Replace the plotted history, e.g. from ResultStore.records()
+        for values in self.values.values():
+            values.clear()
+        self.times.clear()
+        for record in records:
+            self.add(record)
+
+    def add(self, record):  #One new result, drawn on the next refresh()
+        for metric, values in self.values.items():
+            values.append(record.get(metric, 0))
+        self.times.append(record.get('time', float('nan')))
+        self.dirty = True
+
+    def refresh(self):  #Push changed data into the existing lines and redraw when Tk is idle
+        if not self.dirty:
+            return
+        from history import DAY, by_period, lttb, moving_average
+        for metric, values in self.values.items():
+            if self.period:  #x is days since the first period
+                starts, values, _ = by_period(self.times, values, self.period)
+                x = (starts - starts[0]) / DAY if len(starts) else starts
+            else:
+                x = range(1, len(values) + 1)
+            self.lines[metric].set_data(*lttb(x, values, self.budget))
+            self.trends[metric].set_data(*lttb(x, moving_average(values, self.window), self.budget))
+            ax = self.axes[metric]
+            ax.relim()
+            ax.autoscale_view()
+            self.canvases[metric].draw_idle()
+        self.dirty = False
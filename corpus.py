@@ -0,0 +1,162 @@
+import json, mmap, os, random, shutil, struct, sys
+from array import array
+
+#Sentence corpus: parsed once, indexed by difficulty, sampled in O(1)
+#Passage ids are global ints; passages of one difficulty occupy one contiguous id range
+
+MAGIC = b'TTCORP\x01\x00'
+_HEADER = struct.Struct('<8sII')  # magic, passage count, group count
+_GROUP = struct.Struct('<II')  # first id, end id (exclusive)
+
+_loaded = {}  # path -> corpus, so restarts never touch the disk again
+
+
+def split_key(key):  #'simple_12' -> 'simple'
+    name, _, number = key.rpartition('_')
+    return name if name and number.isdigit() else key
+
+
+class Corpus:  #Fully in-memory corpus
+    def __init__(self, groups):  # groups: {difficulty: [passage, ...]}
+        self.texts = []
+        self.ranges = {}
+        for difficulty, passages in groups.items():
+            start = len(self.texts)
+            self.texts.extend(passages)
+            self.ranges[difficulty] = (start, len(self.texts))
+        self.lengths = array('I', map(len, self.texts))  # Precomputed passage lengths
+        self.difficulties = [d for d, (start, end) in self.ranges.items() if end > start]
+
+    @classmethod
+    def from_json(cls, path):  #Old format: {"simple_1": "...", "medium_4": "..."}
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        groups = {}
+        for key, text in data.items():
+            groups.setdefault(split_key(key), []).append(text)
+        return cls(groups)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def pick(self, difficulty=None):  #Random passage id, uniform difficulty then uniform passage
+        if difficulty is None:
+            difficulty = random.choice(self.difficulties)
+        start, end = self.ranges[difficulty]
+        return random.randrange(start, end)
+
+    def passage(self, pid):
+        return self.texts[pid]
+
+    def length(self, pid):
+        return self.lengths[pid]
+
+    def difficulty_of(self, pid):
+        for difficulty, (start, end) in self.ranges.items():
+            if start <= pid < end:
+                return difficulty
+
+    def sample(self, difficulty=None):
+        return self.passage(self.pick(difficulty))
+
+
+class MappedCorpus(Corpus):  #Same interface, backed by an mmap'd index file, opened on first use
+    def __init__(self, path):
+        self.path = path
+        self._file, self._map = None, None
+        self.ranges, self.difficulties = None, None
+
+    def _open(self):
+        self._file = open(self.path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, groups = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{self.path} is not a corpus index')
+        pos = _HEADER.size
+        self.ranges = {}
+        for _ in range(groups):
+            size = self._map[pos]
+            name = self._map[pos + 1:pos + 1 + size].decode('utf-8')
+            pos += 1 + size
+            self.ranges[name] = _GROUP.unpack_from(self._map, pos)
+            pos += _GROUP.size
+        self.difficulties = [d for d, (start, end) in self.ranges.items() if end > start]
+        self._offsets = pos  # uint64[count + 1] byte offsets into the text blob
+        self._lengths = pos + 8 * (self.count + 1)  # uint32[count] passage lengths in chars
+        self._blob = self._lengths + 4 * self.count
+
+    def _ready(self):
+        if self._map is None:
+            self._open()
+
+    def __len__(self):
+        self._ready()
+        return self.count
+
+    def pick(self, difficulty=None):
+        self._ready()
+        return Corpus.pick(self, difficulty)
+
+    def passage(self, pid):
+        self._ready()
+        start, end = struct.unpack_from('<QQ', self._map, self._offsets + 8 * pid)
+        return self._map[self._blob + start:self._blob + end].decode('utf-8')
+
+    def length(self, pid):
+        self._ready()
+        return struct.unpack_from('<I', self._map, self._lengths + 4 * pid)[0]
+
+    def difficulty_of(self, pid):
+        self._ready()
+        return Corpus.difficulty_of(self, pid)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._file, self._map = None, None
+
+
+def write_mapped(groups, path):  #groups: {difficulty: iterable of passages}, written atomically
+    tmp, blob_path = f'{path}.tmp', f'{path}.blob'
+    offsets, lengths, ranges = array('Q', [0]), array('I'), []
+    try:
+        with open(blob_path, 'w+b') as blob:  #Text goes straight to disk, only the offsets stay in memory
+            for difficulty, passages in groups.items():
+                start = len(lengths)
+                for text in passages:
+                    offsets.append(offsets[-1] + blob.write(text.encode('utf-8')))
+                    lengths.append(len(text))
+                ranges.append((difficulty, start, len(lengths)))
+            if sys.byteorder != 'little':
+                offsets.byteswap()
+                lengths.byteswap()
+            with open(tmp, 'wb') as file:
+                file.write(_HEADER.pack(MAGIC, len(lengths), len(ranges)))
+                for difficulty, start, end in ranges:
+                    name = difficulty.encode('utf-8')
+                    file.write(bytes([len(name)]) + name + _GROUP.pack(start, end))
+                file.write(offsets.tobytes())
+                file.write(lengths.tobytes())
+                blob.seek(0)
+                shutil.copyfileobj(blob, file, 1 << 20)
+                file.flush()
+                os.fsync(file.fileno())
+    finally:
+        os.remove(blob_path)
+    os.replace(tmp, path)
+
+
+def load_corpus(path):  #.json is parsed into memory, anything else is treated as a mapped index
+    if path not in _loaded:
+        if path.endswith('.json'):
+            _loaded[path] = Corpus.from_json(path)
+        else:
+            _loaded[path] = MappedCorpus(path)
+    return _loaded[path]
+
+
+if __name__ == "__main__":  #python corpus.py "garbage - Copy.json" corpus.bin
+    source = Corpus.from_json(sys.argv[1])
+    write_mapped({d: source.texts[start:end] for d, (start, end) in source.ranges.items()}, sys.argv[2])
+    print(f'Wrote {len(source)} passages to {sys.argv[2]}')
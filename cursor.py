@@ -0,0 +1,36 @@
+#Cursor flicker: the colour table is built once and a single after() loop walks it for the life of the app
+
+
+def build_palette(dark=(0x37, 0x34, 0x41), bright=(0xB0, 0x26, 0xE7), steps=200):  #dark -> bright -> dark
+    palette = []
+    for state in range(steps * 2):
+        intensity = state / steps if state < steps else (steps * 2 - state) / steps
+        r, g, b = (int(d + (l - d) * intensity) for d, l in zip(dark, bright))
+        palette.append(f"#{r:02x}{g:02x}{b:02x}")
+    return palette
+
+
+class CursorAnimator:
+    def __init__(self, root, set_color, interval=50, palette=None):
+        self.root = root
+        self.set_color = set_color  # Called with a hex colour on every tick while visible
+        self.interval = interval
+        self.palette = palette or build_palette()
+        self.state = 0
+        self.visible = False  # The key handler only flips this, it never touches the timer
+        self.after_id = None
+
+    def start(self):
+        if self.after_id is None:
+            self.after_id = self.root.after(self.interval, self._tick)
+
+    def _tick(self):
+        if self.visible:
+            self.state = (self.state + 1) % len(self.palette)
+            self.set_color(self.palette[self.state])
+        self.after_id = self.root.after(self.interval, self._tick)
+
+    def stop(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
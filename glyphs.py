@@ -0,0 +1,105 @@
+import json, mmap, os
+from collections import OrderedDict
+
+#Letter images: every PNG in content/ is decoded once, resized PhotoImages are kept in an LRU by (char, size)
+#If buildatlas.py has been run, glyphs are cropped from the memory-mapped, pre-resampled atlas and the PNGs are not read
+
+SIZE_BUCKETS = (32, 48, 64, 96, 128, 160, 192, 224, 256)  # Glyph sizes are snapped to these so resizes hit the cache
+ATLAS_INDEX = 'glyphs.atlas.json'  # Written next to the PNGs by buildatlas.py
+
+
+def bucket_size(size):  #Largest bucket that fits in size, never below the smallest one
+    best = SIZE_BUCKETS[0]
+    for bucket in SIZE_BUCKETS:
+        if bucket <= size:
+            best = bucket
+    return best
+
+
+class GlyphCache:
+    def __init__(self, folder, capacity=64):
+        self.folder = folder
+        self.capacity = capacity  # Max resized PhotoImages kept alive
+        self.originals = {}
+        self.atlas, self.places = None, {}  # Atlas image and (char, size) -> (x, y) in it
+        self.chars = set()
+        self.photos = OrderedDict()
+        self.load()
+
+    def load(self):
+        if not self.load_atlas():
+            self.load_originals()
+
+    def load_atlas(self):  #Index read and atlas mapped, False if missing or older than the PNGs
+        index_path = os.path.join(self.folder, ATLAS_INDEX)
+        try:
+            built = os.path.getmtime(index_path)
+            if any(os.path.getmtime(os.path.join(self.folder, name)) > built
+                   for name in os.listdir(self.folder) if self._is_glyph(name)):
+                print('Glyph atlas is out of date, run buildatlas.py')
+                return False
+            with open(index_path, 'r', encoding='utf-8') as file:
+                index = json.load(file)
+            from PIL import Image
+            with open(os.path.join(self.folder, index['image']), 'rb') as file:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)  # Stays valid after close
+            self.atlas = Image.frombuffer('RGBA', (index['width'], index['height']), self._map, 'raw', 'RGBA', 0, 1)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f'Error: {e}')
+            return False
+        self.places = {(char, int(size)): tuple(place) for char, sizes in index['glyphs'].items()
+                       for size, place in sizes.items()}
+        self.chars.update(index['glyphs'])
+        return True
+
+    @staticmethod
+    def _is_glyph(name):
+        char, ext = os.path.splitext(name)
+        return ext.lower() == '.png' and len(char) == 1
+
+    def load_originals(self):  #Decode a.png ... z.png, skip anything that is not a single-letter image
+        from PIL import Image  # PIL is imported here, not at startup
+        for name in sorted(os.listdir(self.folder)):
+            if not self._is_glyph(name):
+                continue
+            try:
+                with Image.open(os.path.join(self.folder, name)) as image:
+                    self.originals[name[0].lower()] = image.convert('RGBA')
+            except Exception as e:
+                print(f'Error: {e}')
+        self.chars.update(self.originals)
+
+    def __contains__(self, char):
+        return char in self.chars
+
+    def get(self, char, size):  #PhotoImage for char at size x size, or None if there is no image
+        key = (char, size)
+        photo = self.photos.get(key)
+        if photo is not None:
+            self.photos.move_to_end(key)
+            return photo
+        place = self.places.get(key)
+        if place is not None:  #Pre-resampled, just a crop
+            x, y = place
+            photo = self.make_photo(self.atlas.crop((x, y, x + size, y + size)))
+        else:
+            if not self.originals and char in self.chars:  #Size the atlas does not have, fall back to the PNGs
+                self.load_originals()
+            original = self.originals.get(char)
+            if original is None:
+                return None
+            from PIL import Image
+            photo = self.make_photo(original.resize((size, size), Image.Resampling.LANCZOS))
+        self.photos[key] = photo
+        if len(self.photos) > self.capacity:
+            self.photos.popitem(last=False)  # Drop least recently used
+        return photo
+
+    def make_photo(self, image):  #Tk image for a resized glyph, needs a Tk root
+        from PIL import ImageTk
+        return ImageTk.PhotoImage(image)
+
+    def clear(self):
+        self.photos.clear()
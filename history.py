@@ -0,0 +1,56 @@
+import time
+import numpy as np
+
+#Results history reductions for charting: per-day/week means, moving averages
+#and LTTB downsampling so a chart never draws more than a fixed number of points
+
+DAY = 86400
+
+
+def lttb(x, y, budget):  #Largest-Triangle-Three-Buckets: keeps the visual shape with at most budget points
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if budget >= n or budget < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, budget - 1).astype(np.int64)  # budget - 2 buckets between first and last point
+    keep = np.empty(budget, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(budget - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        following = slice(end, edges[i + 2] if i + 2 < len(edges) else n)  # Next bucket, averaged
+        cx, cy = x[following].mean(), y[following].mean()
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+
+def moving_average(y, window):  #Trailing mean over the last window points (fewer at the start)
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) == 0 or window <= 1:
+        return y
+    sums = np.cumsum(np.insert(y, 0, 0.0))
+    counts = np.minimum(np.arange(1, len(y) + 1), window)
+    return (sums[1:] - sums[np.arange(1, len(y) + 1) - counts]) / counts
+
+
+def by_period(times, values, period='day', utc_offset=None):  #(period start time, mean, count) per local day or week
+    if utc_offset is None:
+        utc_offset = time.localtime().tm_gmtoff
+    times, values = np.asarray(times, dtype=np.float64), np.asarray(values, dtype=np.float64)
+    mask = np.isfinite(times)  # Results from the old data.json have no timestamp
+    local = times[mask] + utc_offset
+    if period == 'week':  # Epoch day 0 was a Thursday, shift so weeks start on Monday
+        keys = np.floor((local / DAY + 3) / 7).astype(np.int64)
+        starts = (keys * 7 - 3) * DAY - utc_offset
+    else:
+        keys = np.floor(local / DAY).astype(np.int64)
+        starts = keys * DAY - utc_offset
+    if not len(keys):
+        return starts, np.zeros(0), np.zeros(0, dtype=np.int64)
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    counts = np.bincount(inverse)
+    means = np.bincount(inverse, weights=values[mask]) / counts
+    return starts[first], means, counts
@@ -0,0 +1,35 @@
+#Live speed readout: a fixed-rate after() loop reads the session's running counters and repaints only on change
+#The key handlers never touch it, so typing cost does not depend on the HUD
+
+
+class Hud:
+    def __init__(self, root, set_text, get_session, fps=10):
+        self.root = root
+        self.set_text = set_text  # Called with the new text when it changes
+        self.get_session = get_session  # Current TypingSession or None, read on every frame
+        self.interval = max(1, int(1000 / fps))
+        self.text, self.after_id = None, None
+
+    def format(self, live):
+        if live is None:
+            return "WPM --  Raw --\nAcc --  0:00"
+        minutes, seconds = divmod(int(live['elapsed']), 60)
+        return (f"WPM {live['wpm']:.0f} ({live['instant']:.0f})  Raw {live['raw']:.0f}\n"
+                f"Acc {live['accuracy']:.1f}%  {minutes}:{seconds:02d}")
+
+    def start(self):
+        if self.after_id is None:
+            self.after_id = self.root.after(self.interval, self._tick)
+
+    def _tick(self):
+        session = self.get_session()
+        text = self.format(session.live() if session is not None else None)
+        if text != self.text:
+            self.text = text
+            self.set_text(text)
+        self.after_id = self.root.after(self.interval, self._tick)
+
+    def stop(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
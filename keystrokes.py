@@ -0,0 +1,112 @@
+import os, struct, sys, time
+from array import array
+
+#Per-keystroke capture: one row per key press or backspace, kept in preallocated column arrays
+#Sessions are appended to a binary log as one block each: header, then every column back to back
+
+KEY, BACKSPACE = 0, 1
+MAGIC = b'TTKS'
+BLOCK = struct.Struct('<4sQI')  # magic, session id, row count
+COLUMNS = (('t', 'q'), ('index', 'I'), ('expected', 'I'), ('typed', 'I'), ('kind', 'B'))  # name, array typecode
+ROW_SIZE = sum(array(code).itemsize for _, code in COLUMNS)
+
+
+class KeystrokeRecorder:
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.t = array('q', [0]) * capacity  # perf_counter_ns() timestamps
+        self.index = array('I', [0]) * capacity  # Position in the passage
+        self.expected = array('I', [0]) * capacity  # Code points, 0 for none
+        self.typed = array('I', [0]) * capacity
+        self.kind = array('B', [0]) * capacity  # KEY or BACKSPACE
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.session_id = time.time_ns()
+
+    def _grow(self):
+        for name, _ in COLUMNS:
+            column = getattr(self, name)
+            column.extend(column)  # Double in place, old rows stay where they are
+        self.capacity *= 2
+
+    def key(self, index, expected, typed, t=None):  #t in perf_counter_ns() units, now if None
+        if t is None:
+            t = time.perf_counter_ns()
+        i = self.count
+        if i == self.capacity:
+            self._grow()
+        self.t[i], self.index[i], self.kind[i] = t, index, KEY
+        self.expected[i] = ord(expected[0]) if expected else 0
+        self.typed[i] = ord(typed[0]) if typed else 0
+        self.count = i + 1
+
+    def backspace(self, index, expected, t=None):  #index is the position being erased
+        if t is None:
+            t = time.perf_counter_ns()
+        i = self.count
+        if i == self.capacity:
+            self._grow()
+        self.t[i], self.index[i], self.kind[i] = t, index, BACKSPACE
+        self.expected[i] = ord(expected[0]) if expected else 0
+        self.typed[i] = 0
+        self.count = i + 1
+
+    def columns(self):  #Recorded rows only, as new arrays
+        return {name: getattr(self, name)[:self.count] for name, _ in COLUMNS}
+
+
+class KeystrokeLog:
+    def __init__(self, path):
+        self.path = path
+
+    @staticmethod
+    def encode(recorder):  #One session block as bytes, a snapshot the recorder can be reset after
+        if recorder.count == 0:
+            return b''
+        chunks = [BLOCK.pack(MAGIC, recorder.session_id, recorder.count)]
+        for name, column in recorder.columns().items():
+            if sys.byteorder != 'little':
+                column.byteswap()
+            chunks.append(column.tobytes())
+        return b''.join(chunks)
+
+    def append_blocks(self, blocks):  #Encoded blocks in one write and one fsync
+        data = b''.join(blocks)
+        if not data:
+            return
+        with open(self.path, 'ab') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def append(self, recorder):  #Write one session block
+        self.append_blocks([self.encode(recorder)])
+
+    def blocks(self, data):  #Yield (session id, count, offset of first column) for each complete block in data
+        pos, size = 0, len(data)
+        while pos + BLOCK.size <= size:
+            magic, session_id, count = BLOCK.unpack_from(data, pos)
+            end = pos + BLOCK.size + count * ROW_SIZE
+            if magic != MAGIC or end > size:
+                return  # Torn tail from a crash
+            yield session_id, count, pos + BLOCK.size
+            pos = end
+
+    def sessions(self):  #Yield (session id, {column: array}) for every stored session
+        try:
+            with open(self.path, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return
+        for session_id, count, pos in self.blocks(data):
+            columns = {}
+            for name, code in COLUMNS:
+                column = array(code)
+                column.frombytes(data[pos:pos + count * column.itemsize])
+                if sys.byteorder != 'little':
+                    column.byteswap()
+                columns[name] = column
+                pos += count * column.itemsize
+            yield session_id, columns
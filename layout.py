@@ -0,0 +1,62 @@
+from array import array
+
+#Text layout in pure Python: glyph widths come from Font.measure once per distinct character,
+#then every position and line break is computed before anything is drawn
+
+
+class Layout:  #Result of TextLayout.layout: top-left of every character plus overall size
+    def __init__(self):
+        self.xs, self.ys, self.widths = array('i'), array('i'), array('i')
+        self.lines = array('I')  # Index of the first character of each line
+        self.width, self.height = 0, 0
+
+    def line_of(self, index):  #Line number holding character index
+        lo, hi = 0, len(self.lines) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.lines[mid] <= index:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+
+class TextLayout:
+    def __init__(self, font, spacing=2, space_width=10):
+        self.font = font  # tkinter.font.Font
+        self.spacing = spacing  # Gap after every non-space character
+        self.space_width = space_width
+        self.line_height = font.metrics('linespace')
+        self.widths = {}  # char -> advance in px
+
+    def advance(self, char):
+        width = self.widths.get(char)
+        if width is None:
+            width = self.space_width if char == ' ' else self.font.measure(char) + self.spacing
+            self.widths[char] = width
+        return width
+
+    def layout(self, text, max_width):  #Greedy word wrap, a word only moves down if it is not first on its line
+        result = Layout()
+        xs, ys, widths = result.xs, result.ys, result.widths
+        x, y, right = 0, 0, 0
+        result.lines.append(0)
+        for word in text.split(' '):
+            word_width = sum(self.advance(char) for char in word)
+            if x > 0 and x + word_width > max_width:
+                x, y = 0, y + self.line_height
+                result.lines.append(len(xs))
+            for char in word:
+                width = self.advance(char)
+                xs.append(x)
+                ys.append(y)
+                widths.append(width)
+                x += width
+            right = max(right, x)
+            if len(xs) < len(text):  # The space after the word stays on the same line
+                xs.append(x)
+                ys.append(y)
+                widths.append(self.space_width)
+                x += self.space_width
+        result.width, result.height = right, y + self.line_height
+        return result
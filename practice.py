@@ -0,0 +1,157 @@
+import heapq, mmap, os, random, shutil, struct, sys
+from array import array
+from collections import Counter, deque
+
+#Weak-spot practice: an inverted index from character n-grams to the passages that contain them
+#Each posting list is sorted densest first (count / passage length), so a pick only reads the head of a few lists
+#The index is built by buildcorpus.py next to the corpus (<corpus>.ngrams) or in memory for the small JSON corpus
+
+MAGIC = b'TTNGRM\x01\x00'
+_HEADER = struct.Struct('<8sII')  # magic, gram count, posting count
+_GRAM = struct.Struct('<II')  # first posting, posting count
+
+
+def grams(text, sizes=(1, 2)):  #{'t': 3, 'th': 1, ...}
+    counts = Counter()
+    for n in sizes:
+        counts.update(text[i:i + n] for i in range(len(text) - n + 1))
+    return counts
+
+
+class NgramIndex:  #In-memory index, gram -> (passage ids, counts)
+    def __init__(self, postings):
+        self.postings_by_gram = postings
+
+    @classmethod
+    def build(cls, corpus, sizes=(1, 2)):
+        pids, counts = {}, {}
+        for pid in range(len(corpus)):
+            for gram, count in grams(corpus.passage(pid), sizes).items():
+                if gram not in pids:
+                    pids[gram], counts[gram] = array('I'), array('H')
+                pids[gram].append(pid)
+                counts[gram].append(min(count, 0xFFFF))
+        postings = {}
+        for gram, ids in pids.items():
+            n = counts[gram]
+            order = sorted(range(len(ids)), key=lambda j: -n[j] / max(corpus.length(ids[j]), 1))
+            postings[gram] = (array('I', (ids[j] for j in order)), array('H', (n[j] for j in order)))
+        return cls(postings)
+
+    def postings(self, gram, limit=None):  #Densest first, at most limit entries
+        ids, counts = self.postings_by_gram.get(gram, (array('I'), array('H')))
+        return ids[:limit], counts[:limit]
+
+    def save(self, path):
+        write_index(((gram, ids, counts) for gram, (ids, counts) in self.postings_by_gram.items()), path)
+
+
+class MappedNgramIndex(NgramIndex):  #Same interface over a saved index, only the gram table is read up front
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, grams_count, total = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not an n-gram index')
+        pos, self.table = _HEADER.size, {}
+        for _ in range(grams_count):
+            size = self._map[pos]
+            name = self._map[pos + 1:pos + 1 + size].decode('utf-8')
+            pos += 1 + size
+            self.table[name] = _GRAM.unpack_from(self._map, pos)
+            pos += _GRAM.size
+        self._ids, self._counts = pos, pos + 4 * total
+
+    def postings(self, gram, limit=None):
+        start, count = self.table.get(gram, (0, 0))
+        if limit is not None:
+            count = min(count, limit)
+        ids, counts = array('I'), array('H')
+        ids.frombytes(self._map[self._ids + 4 * start:self._ids + 4 * (start + count)])
+        counts.frombytes(self._map[self._counts + 2 * start:self._counts + 2 * (start + count)])
+        if sys.byteorder != 'little':
+            ids.byteswap()
+            counts.byteswap()
+        return ids, counts
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def write_index(postings, path):  #postings: (gram, ids, counts) in any gram order, streamed to disk, written atomically
+    tmp, ids_path, counts_path = f'{path}.tmp', f'{path}.ids', f'{path}.counts'
+    table, total = [], 0  # Only the gram table stays in memory
+    try:
+        with open(ids_path, 'w+b') as ids_file, open(counts_path, 'w+b') as counts_file:
+            for gram, ids, counts in postings:
+                table.append((gram.encode('utf-8'), total, len(ids)))
+                total += len(ids)
+                if sys.byteorder != 'little':
+                    ids, counts = array('I', ids), array('H', counts)
+                    ids.byteswap()
+                    counts.byteswap()
+                ids_file.write(ids.tobytes())
+                counts_file.write(counts.tobytes())
+            with open(tmp, 'wb') as file:
+                file.write(_HEADER.pack(MAGIC, len(table), total))
+                for name, start, count in table:
+                    file.write(bytes([len(name)]) + name + _GRAM.pack(start, count))
+                for part in (ids_file, counts_file):
+                    part.seek(0)
+                    shutil.copyfileobj(part, file, 1 << 20)
+    finally:
+        for part in (ids_path, counts_path):
+            if os.path.exists(part):
+                os.remove(part)
+    os.replace(tmp, path)
+
+
+def index_path(corpus_path):
+    return f'{corpus_path}.ngrams'
+
+
+def load_index(corpus, corpus_path):  #Saved index if it is newer than the corpus, otherwise built in memory
+    path = index_path(corpus_path)
+    try:
+        if os.path.getmtime(path) >= os.path.getmtime(corpus_path):
+            return MappedNgramIndex(path)
+    except OSError:
+        pass
+    return NgramIndex.build(corpus)
+
+
+def weak_grams(analytics, top=8, min_attempts=5, prior=20):  #{gram: weight}, weight > 1 means worse than average
+    rates = {**analytics.errors(), **analytics.bigram_errors(min_attempts)}
+    attempts = sum(count for _, count in rates.values())
+    if not attempts:
+        return {}
+    mean = max(sum(rate * count for rate, count in rates.values()) / attempts, 1e-3)
+    weights = {}
+    for gram, (rate, count) in rates.items():
+        if count >= min_attempts and not gram.isspace():
+            weights[gram] = (rate * count + prior * mean) / (count + prior) / mean  # Shrunk towards the mean
+    return dict(heapq.nlargest(top, ((g, w) for g, w in weights.items() if w > 1), key=lambda item: item[1]))
+
+
+class Practice:
+    def __init__(self, corpus, index, weights, limit=2000, top=20, history=10):
+        self.corpus, self.index = corpus, index
+        self.weights = weights  # From weak_grams()
+        self.limit = limit  # Postings read per gram
+        self.top = top  # Random pick among this many best passages, so practice does not repeat
+        self.recent = deque(maxlen=history)
+
+    def pick(self):  #Passage id rich in weak n-grams, None if there is nothing to go on
+        scores = {}
+        for gram, weight in self.weights.items():
+            ids, counts = self.index.postings(gram, self.limit)
+            for pid, count in zip(ids, counts):
+                scores[pid] = scores.get(pid, 0.0) + weight * count / max(self.corpus.length(pid), 1)
+        candidates = [pid for pid, _ in heapq.nlargest(self.top + len(self.recent), scores.items(),
+                                                       key=lambda item: item[1]) if pid not in self.recent]
+        if not candidates:
+            return None
+        pid = random.choice(candidates[:self.top])
+        self.recent.append(pid)
+        return pid
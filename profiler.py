@@ -0,0 +1,78 @@
+import functools, json, os, sys, threading, time
+from collections import deque
+
+#Opt-in hot-path profiler: python app.py --profile (or TYPINGTEST_PROFILE=1)
+#When off nothing is wrapped, so the handlers run exactly as before; when on, each instrumented method
+#keeps a rolling window of latencies for the overlay and appends a Chrome trace event (chrome://tracing, Perfetto)
+
+HOT_PATH = ('handle_key_press', 'render_pending', 'update_letter_image', 'resize_image', 'update_red_line',
+            'create_text_grid', 'show_results')
+
+
+class Profiler:
+    def __init__(self, enabled=None, window=200, max_events=1_000_000):
+        if enabled is None:
+            enabled = '--profile' in sys.argv or bool(os.environ.get('TYPINGTEST_PROFILE'))
+        self.enabled = enabled
+        self.window = window  # Latest calls per method kept for the overlay
+        self.samples = {}  # name -> deque of ms
+        self.events = deque(maxlen=max_events)  # Oldest trace events are dropped on very long runs
+        self.origin = time.perf_counter_ns()
+        self.pid, self.tid = os.getpid(), threading.get_ident()
+
+    def instrument(self, obj, names=HOT_PATH):  #Shadow obj's methods with timed ones, a no-op when disabled
+        if not self.enabled:
+            return
+        for name in names:
+            method = getattr(obj, name, None)
+            if method is not None:
+                setattr(obj, name, self.wrap(name, method))
+
+    def wrap(self, name, func):
+        samples = self.samples.setdefault(name, deque(maxlen=self.window))
+        events, clock, origin = self.events, time.perf_counter_ns, self.origin
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end = clock()
+                samples.append((end - start) / 1e6)
+                events.append((name, start - origin, end - start))
+        return timed
+
+    def summary(self):  #Rolling p50 / p95 / max in ms per method, for the overlay
+        lines = []
+        for name, samples in self.samples.items():
+            if samples:
+                ordered = sorted(samples)
+                p50, p95 = ordered[len(ordered) // 2], ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+                lines.append(f'{name:<20}{p50:8.3f}{p95:8.3f}{ordered[-1]:8.3f}')
+        return '\n'.join([f'{"ms":<20}{"p50":>8}{"p95":>8}{"max":>8}'] + lines) if lines else 'profiling: no calls yet'
+
+    def export(self, path):  #Chrome trace-event JSON, complete ('X') events with microsecond times
+        trace = [{'name': name, 'ph': 'X', 'ts': start / 1000, 'dur': duration / 1000,
+                  'pid': self.pid, 'tid': self.tid, 'cat': 'hot-path'} for name, start, duration in list(self.events)]
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, file)
+        return len(trace)
+
+
+class ProfileOverlay:  #Repaints the summary on its own timer, like the HUD
+    def __init__(self, root, set_text, profiler, interval=500):
+        self.root, self.set_text, self.profiler = root, set_text, profiler
+        self.interval = interval
+        self.text, self.after_id = None, None
+
+    def start(self):
+        if self.after_id is None:
+            self.after_id = self.root.after(self.interval, self._tick)
+
+    def _tick(self):
+        text = self.profiler.summary()
+        if text != self.text:
+            self.text = text
+            self.set_text(text)
+        self.after_id = self.root.after(self.interval, self._tick)
@@ -0,0 +1,262 @@
+import tkinter as tk
+from array import array
+
+#Passage rendering backends, picked with setting.RENDERER ('virtual' is used by the long-form mode)
+#Both take per-character state changes and only touch the characters that changed
+
+BG = "#373441"
+PENDING, CORRECT, WRONG = 0, 1, 2
+COLORS = ("#BEA8C7", "green", "red")  # Fill per state
+
+
+class CanvasRenderer:  #One canvas text item per character, positions from TextLayout
+    def __init__(self, parent, font, text_layout):
+        self.canvas = tk.Canvas(parent, bg=BG, highlightthickness=0)
+        self.canvas.pack()
+        self.widget = self.canvas
+        self.font, self.text_layout = font, text_layout
+        self.sentence, self.layout = "", None
+        self.items = array('I')  # Canvas id of each character
+        self.cursor_id = None
+
+    def draw(self, sentence, width):
+        self.sentence = sentence
+        self.layout = layout = self.text_layout.layout(sentence, width)  #All positions up front, no bbox round-trips
+        create = self.canvas.create_text
+        self.items = array('I', (create(layout.xs[i], layout.ys[i], text=char, font=self.font,
+                                        anchor="nw", fill=COLORS[PENDING]) for i, char in enumerate(sentence)))
+        self.canvas.config(width=layout.width, height=layout.height + 20)
+
+    def reflow(self, width):  #Move items to a new wrap width, True if any line break changed
+        if self.layout is None:
+            return False
+        layout = self.text_layout.layout(self.sentence, width)
+        if layout.lines == self.layout.lines:
+            return False
+        for i, item in enumerate(self.items):
+            self.canvas.coords(item, layout.xs[i], layout.ys[i])
+        self.canvas.config(width=layout.width, height=layout.height + 20)
+        self.layout = layout
+        return True
+
+    def mark(self, index, state):
+        self.canvas.itemconfig(self.items[index], fill=COLORS[state])
+
+    def cursor_box(self, index):  #Underline box of character index, from the layout
+        layout = self.layout
+        x1, bottom = layout.xs[index], layout.ys[index] + self.text_layout.line_height
+        return x1, bottom - 6, x1 + layout.widths[index] - self.text_layout.spacing, bottom - 3
+
+    def show_cursor(self, index):  #Put the cursor under character index, False if there is none
+        if self.layout is None or index >= len(self.sentence):
+            if self.cursor_id:
+                self.canvas.itemconfig(self.cursor_id, state="hidden")
+            return False
+        if self.cursor_id is None:  #Created once, only moved afterwards
+            self.cursor_id = self.canvas.create_rectangle(*self.cursor_box(index), fill="#B026E7", outline="",
+                                                          tags="red_line")
+            self.canvas.lift(self.cursor_id)
+        else:
+            self.canvas.coords(self.cursor_id, *self.cursor_box(index))
+            self.canvas.itemconfig(self.cursor_id, state="normal")
+        return True
+
+    def cursor_color(self, color):
+        if self.cursor_id:
+            self.canvas.itemconfig(self.cursor_id, fill=color)
+
+    def clear(self):
+        self.canvas.delete("all")
+        self.layout, self.cursor_id = None, None
+
+    def destroy(self):
+        self.canvas.destroy()
+
+
+class TextRenderer:  #A single tk.Text holding the passage, states are tag ranges and Tk does the wrapping
+    def __init__(self, parent, font, text_layout, visible_lines=5):
+        self.text = tk.Text(parent, bg=BG, fg=COLORS[PENDING], font=font, wrap="word", bd=0,
+                            highlightthickness=0, insertwidth=0, cursor="arrow", takefocus=0,
+                            spacing3=text_layout.line_height // 5)
+        self.text.pack()
+        self.widget = self.text
+        self.font, self.text_layout = font, text_layout
+        self.visible_lines = visible_lines  # Text height in lines, the passage scrolls inside it
+        self.sentence, self.shown = "", False
+        self.text.tag_configure("state1", foreground=COLORS[CORRECT])
+        self.text.tag_configure("state2", foreground=COLORS[WRONG])
+        self.text.tag_configure("cursor", underline=True)
+        self.cursor_index = None
+        try:
+            self.text.tag_configure("cursor", underlinefg="#B026E7")
+            self.colored_cursor = True
+        except tk.TclError:  #underlinefg needs Tk 8.6.6
+            self.colored_cursor = False
+
+    def _size(self, width):  #Tk wraps by itself, so only the width follows the window; height is what fits on screen
+        line = self.text_layout.line_height + self.text_layout.line_height // 5  # linespace + spacing3
+        fits = (self.text.winfo_toplevel().winfo_height() - 84) // line  # Window below the top bar
+        self.text.config(width=max(1, width // max(1, self.font.measure("0"))),
+                         height=max(1, min(self.visible_lines, fits)))
+
+    def draw(self, sentence, width):
+        self.sentence = sentence
+        self.text.config(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("1.0", sentence)
+        self.text.config(state="disabled")  # Tags still work, typing into it does not
+        self._size(width)
+        self.shown = True
+
+    def reflow(self, width):  #Tk re-wraps by itself, only the widget size follows the window
+        if not self.shown:
+            return False
+        self._size(width)
+        return False
+
+    def mark(self, index, state):
+        start = f"1.0+{index}c"
+        self.text.tag_remove("state1", start)
+        self.text.tag_remove("state2", start)
+        if state != PENDING:
+            self.text.tag_add(f"state{state}", start)
+
+    def show_cursor(self, index):
+        if self.cursor_index is not None:
+            self.text.tag_remove("cursor", f"1.0+{self.cursor_index}c")
+            self.cursor_index = None
+        if not self.shown or index >= len(self.sentence):
+            return False
+        self.text.tag_add("cursor", f"1.0+{index}c")
+        self.text.see(f"1.0+{index}c")  #Scroll the line being typed into view
+        self.cursor_index = index
+        return self.colored_cursor  # Nothing to animate without underlinefg
+
+    def cursor_color(self, color):
+        if self.cursor_index is not None:
+            self.text.tag_configure("cursor", underlinefg=color)
+
+    def clear(self):
+        self.text.config(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.config(state="disabled")
+        self.shown, self.cursor_index = False, None
+
+    def destroy(self):
+        self.text.destroy()
+
+
+class LineSlot:  #Canvas items for one on-screen line, handed from line to line as the passage scrolls
+    def __init__(self):
+        self.items = []
+        self.start, self.used = 0, 0  # First character index shown, number of items in use
+
+
+class VirtualCanvasRenderer(CanvasRenderer):  #Long-form mode: only the lines around the cursor have canvas items
+    def __init__(self, parent, font, text_layout, visible_lines=5, margin=1):
+        super().__init__(parent, font, text_layout)
+        self.visible_lines, self.margin = visible_lines, margin
+        self.slots, self.free = {}, []  # line number -> LineSlot in use, recycled slots
+        self.top = 0  # First fully visible line
+        self.states = bytearray()  # State of every character, items come and go
+
+    def draw(self, sentence, width):
+        self.sentence = sentence
+        self.states = bytearray(len(sentence))
+        self.layout = self.text_layout.layout(sentence, width)
+        self.canvas.config(width=self.layout.width, height=self.visible_lines * self.text_layout.line_height + 20)
+        self.top = 0
+        self._place_lines()
+
+    def _offset(self):  #Canvas y of the top visible line
+        return self.top * self.text_layout.line_height
+
+    def _line_end(self, line):
+        lines = self.layout.lines
+        return lines[line + 1] if line + 1 < len(lines) else len(self.sentence)
+
+    def _fill(self, slot, line):  #Point slot at line, reusing its items and creating only what is missing
+        layout, offset = self.layout, self._offset()
+        start, end = layout.lines[line], self._line_end(line)
+        items = slot.items
+        for j, i in enumerate(range(start, end)):
+            x, y, fill = layout.xs[i], layout.ys[i] - offset, COLORS[self.states[i]]
+            if j < len(items):
+                self.canvas.coords(items[j], x, y)
+                self.canvas.itemconfig(items[j], text=self.sentence[i], fill=fill, state="normal")
+            else:
+                items.append(self.canvas.create_text(x, y, text=self.sentence[i], font=self.font,
+                                                     anchor="nw", fill=fill, tags="passage"))
+        for item in items[end - start:slot.used]:
+            self.canvas.itemconfig(item, state="hidden")
+        slot.start, slot.used = start, end - start
+
+    def _place_lines(self):
+        first = max(0, self.top - self.margin)
+        last = min(len(self.layout.lines), self.top + self.visible_lines + self.margin)
+        for line in [line for line in self.slots if not first <= line < last]:
+            self.free.append(self.slots.pop(line))
+        for line in range(first, last):
+            if line not in self.slots:
+                slot = self.free.pop() if self.free else LineSlot()
+                self._fill(slot, line)
+                self.slots[line] = slot
+        for slot in self.free:  # Left over after a jump, keep them for later
+            for item in slot.items[:slot.used]:
+                self.canvas.itemconfig(item, state="hidden")
+            slot.used = 0
+
+    def _scroll_to(self, line):  #Keep line on screen with one line of context above it
+        if self.top <= line < self.top + self.visible_lines - 1:
+            return
+        top = max(0, min(line - 1, len(self.layout.lines) - self.visible_lines))
+        if top == self.top:
+            return
+        shift = (top - self.top) * self.text_layout.line_height
+        self.top = top
+        self.canvas.move("passage", 0, -shift)  # Kept slots move in one Tk call
+        self._place_lines()
+
+    def reflow(self, width):
+        if self.layout is None:
+            return False
+        layout = self.text_layout.layout(self.sentence, width)
+        if layout.lines == self.layout.lines:
+            return False
+        self.layout = layout
+        self.canvas.config(width=layout.width)
+        self.free.extend(self.slots.values())
+        self.slots.clear()
+        self.top = min(self.top, max(0, len(layout.lines) - self.visible_lines))
+        self._place_lines()
+        return True
+
+    def mark(self, index, state):
+        self.states[index] = state
+        if self.layout is None:  #Cleared, like the other backends a mark is then only remembered
+            return
+        slot = self.slots.get(self.layout.line_of(index))
+        if slot is not None:
+            self.canvas.itemconfig(slot.items[index - slot.start], fill=COLORS[state])
+
+    def cursor_box(self, index):
+        x1, y1, x2, y2 = super().cursor_box(index)
+        offset = self._offset()
+        return x1, y1 - offset, x2, y2 - offset
+
+    def show_cursor(self, index):
+        if self.layout is not None and index < len(self.sentence):
+            self._scroll_to(self.layout.line_of(index))
+        return super().show_cursor(index)
+
+    def clear(self):
+        super().clear()
+        self.slots.clear()
+        self.free.clear()
+
+
+RENDERERS = {'canvas': CanvasRenderer, 'text': TextRenderer, 'virtual': VirtualCanvasRenderer}
+
+
+def make_renderer(kind, parent, font, text_layout):
+    return RENDERERS[kind](parent, font, text_layout)
@@ -0,0 +1,145 @@
+import json, os, time
+from stats import Aggregates
+from table import SessionTable
+
+#Finished tests are appended to a JSON Lines log, one fsync'd line per test
+#The log is only ever rewritten by compact() and migrate(), both via an atomic rename
+#Aggregates live next to the log (results.stats.json) and are rebuilt from it whenever they are stale
+#The constructor only reads the saved aggregates; repair() does the migration and rebuilds, which scan the whole log
+#An optional SessionTable (table.py) keeps a columnar copy for range and percentile queries
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return  # Not supported on Windows
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(chunks, path):  #Temp file, fsync, rename over path
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as file:
+        for chunk in chunks:
+            file.write(chunk)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path)
+
+
+def write_lines(records, path):
+    _write_atomic((json.dumps(record, separators=(',', ':')) + '\n' for record in records), path)
+
+
+def write_json(data, path):
+    _write_atomic([json.dumps(data)], path)
+
+
+class ResultStore:
+    def __init__(self, path, legacy_path=None, table_path=None, repair=True):
+        self.path, self.legacy_path = path, legacy_path
+        self.torn = self._torn_tail()
+        self.stats_path = f'{os.path.splitext(path)[0]}.stats.json'
+        self.stats = self._load_stats()  # None until repair() if missing or stale
+        self.table = SessionTable(table_path) if table_path else None
+        if repair:
+            self.repair()
+
+    def repair(self):  #Migrate the legacy file, rebuild stale stats and table; run before any append or stats read
+        if self.legacy_path and not os.path.exists(self.path) and os.path.exists(self.legacy_path):
+            self.migrate(self.legacy_path)
+            self.torn = self._torn_tail()
+        if self.stats is None or self.stats.log_size != self._log_size():
+            self.rebuild_stats()
+        if self.table is not None and len(self.table) != self.stats.count:
+            self.table.rebuild(self.records())
+        return self
+
+    def _log_size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def _load_stats(self):  #Saved aggregates if they cover the whole log, otherwise None
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as file:
+                stats = Aggregates.from_dict(json.load(file))
+            if stats.log_size == self._log_size():
+                return stats
+        except (OSError, ValueError, TypeError):
+            pass
+        return None
+
+    def rebuild_stats(self):
+        self.stats = Aggregates.rebuild(self.records())
+        self.stats.log_size = self._log_size()
+        write_json(self.stats.to_dict(), self.stats_path)
+        return self.stats
+
+    def _torn_tail(self):  #True if a crash left the last line without its newline
+        try:
+            with open(self.path, 'rb') as file:
+                file.seek(0, os.SEEK_END)
+                if file.tell() == 0:
+                    return False
+                file.seek(-1, os.SEEK_END)
+                return file.read(1) != b'\n'
+        except FileNotFoundError:
+            return False
+
+    def append(self, result):  #Constant time whatever the history size
+        return self.append_many([result])[0]
+
+    def append_many(self, results):  #One write, one fsync and one stats save for a batch of results
+        records = []
+        for result in results:
+            record = dict(result)
+            record.setdefault('time', time.time())
+            records.append(record)
+        lines = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records)
+        if self.torn:  #Keep the damaged line from swallowing this one
+            lines, self.torn = '\n' + lines, False
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+            log_size = file.tell()
+        for record in records:
+            self.stats.add(record)
+        if self.table is not None:
+            self.table.append_many(records)
+        self.stats.log_size = log_size
+        write_json(self.stats.to_dict(), self.stats_path)
+        return records
+
+    def records(self):  #Yield every stored result, oldest first; a torn last line is skipped
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def compact(self):  #Rewrite the log without damaged lines
+        write_lines(list(self.records()), self.path)
+        self.torn = False
+        self.stats.log_size = self._log_size()
+        write_json(self.stats.to_dict(), self.stats_path)
+
+    def migrate(self, legacy_path):  #One-time import of the old {"1": {...}, "2": {...}} data.json
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except Exception as e:
+            print(f'Error: {e}')
+            return
+        keys = sorted(data, key=lambda key: int(key) if key.isdigit() else 0)
+        write_lines((data[key] for key in keys), self.path)
@@ -0,0 +1,113 @@
+import time
+from collections import deque
+
+#Typing state and scoring for one test, no tkinter: the app is a view over this,
+#and recorded or simulated keystrokes can be fed straight in for batch scoring
+#Per-character state is one flag byte per position; the score is kept as a running count
+
+CORRECT = 1  # Last key typed at the position was right
+DIRTY = 2  # Position was backspaced over, it can no longer count towards the score
+WINDOW = 5.0  # Seconds of recent keys behind the instant WPM
+
+
+class TypingSession:
+    def __init__(self, sentence, recorder=None):
+        self.sentence = sentence
+        self.recorder = recorder  # Optional KeystrokeRecorder, gets every key and backspace
+        self.reset()
+
+    def reset(self):
+        self.index = 0
+        self.flags = bytearray(len(self.sentence))  # CORRECT | DIRTY per position
+        self.score = 0  # Positions that are CORRECT and not DIRTY
+        self.errors = 0  # Wrong keys typed, even if fixed later
+        self.keys = 0  # Every key typed, right or wrong
+        self.recent = deque(maxlen=512)  # Times of the latest keys, trimmed to WINDOW when read
+        self.start_time, self.end_time = None, None
+
+    def __len__(self):
+        return len(self.sentence)
+
+    @property
+    def finished(self):
+        return self.index >= len(self.sentence)
+
+    @property
+    def expected(self):  #Character the next key should be, None when finished
+        return None if self.finished else self.sentence[self.index]
+
+    @property
+    def progress(self):
+        return self.index / len(self.sentence) if self.sentence else 1.0
+
+    def feed(self, char, t=None):  #Type char at the current position, True/False for right/wrong, None if ignored
+        if self.finished or not char:
+            return None
+        if t is None:
+            t = time.perf_counter()
+        if self.start_time is None:  #Timer starts on the first key
+            self.start_time = t
+        i = self.index
+        expected = self.sentence[i]
+        if self.recorder is not None:
+            self.recorder.key(i, expected, char, round(t * 1e9))  # Same clock as the session, in ns
+        ok = char == expected
+        self.keys += 1
+        self.recent.append(t)
+        if ok:
+            self.flags[i] |= CORRECT
+            if not self.flags[i] & DIRTY:
+                self.score += 1
+        else:
+            self.errors += 1
+        self.index = i + 1
+        if self.index == len(self.sentence):
+            self.end_time = t
+        return ok
+
+    def backspace(self, t=None):  #Step back one position, returns the index that was cleared or None
+        if self.index == 0:
+            return None
+        if t is None:
+            t = time.perf_counter()
+        self.index -= 1
+        i = self.index
+        if self.recorder is not None:
+            self.recorder.backspace(i, self.sentence[i], round(t * 1e9))
+        if self.flags[i] == CORRECT:  #Was counted, and will not be again
+            self.score -= 1
+        self.flags[i] = DIRTY
+        return i
+
+    def live(self, t=None):  #Running numbers for the HUD, O(1) apart from trimming the key window
+        #wpm and accuracy are result()'s formulas over the positions typed so far, so they match it when the test ends
+        if self.start_time is None:
+            return None
+        end = self.end_time if self.end_time is not None else (time.perf_counter() if t is None else t)
+        elapsed = end - self.start_time
+        recent = self.recent
+        while recent and recent[0] < end - WINDOW:
+            recent.popleft()
+        minutes, window_minutes = elapsed / 60, min(WINDOW, elapsed) / 60
+        return {
+            'elapsed': elapsed,
+            'wpm': self.index / 5 / minutes if minutes > 0 else 0,
+            'raw': self.keys / 5 / minutes if minutes > 0 else 0,
+            'instant': len(recent) / 5 / window_minutes if window_minutes > 0 else 0,
+            'accuracy': self.score / self.index * 100 if self.index else 100,
+        }
+
+    def result(self, t=None):  #Score so far, the end time defaults to the last key of a finished test
+        end = self.end_time if self.end_time is not None else (time.perf_counter() if t is None else t)
+        elapsed_minutes = (end - self.start_time) / 60 if self.start_time is not None else 0
+        correct = self.score
+        total = len(self.sentence)
+        return {
+            'accuracy': (correct / total) * 100 if total > 0 else 0,
+            'wpm': (total / 5) / elapsed_minutes if elapsed_minutes > 0 else 0,
+            'cpm': total / elapsed_minutes if elapsed_minutes > 0 else 0,
+            'correct': correct,
+            'total': total,
+            'errors': self.errors,
+            'elapsed': elapsed_minutes * 60,
+        }
@@ -1,4 +1,19 @@
 
 WIDTH = 1280
 HEIGHT = 720
+RESIZE_DEBOUNCE_MS = 150  #Window resizes are applied once the user stops dragging for this long
 
+RESULTS_PATH = "results.jsonl"  #Append-only results log, imported once from data.json
+KEYSTROKES_PATH = "keystrokes.bin"  #Per-keystroke timings, one binary block per finished test
+RENDERER = "canvas"  #"canvas" (one item per character) or "text" (tk.Text with tag ranges, for long passages)
+LONG_FORM_PATH = "longform.txt"  #Article or chapter for the long-form test (button 3), if the file exists
+LONG_FORM_PASSAGES = 300  #Otherwise this many corpus passages are joined
+STARTUP_BUDGET_MS = 500  #Launch to first accepted keystroke, checked by --startup-report
+CORPUS_PATH = "garbage - Copy.json"  #JSON corpus, or an index written by corpus.py (memory-mapped)
+
+CHART_POINTS = 300  #Most points drawn per stats line, longer histories are downsampled
+CHART_WINDOW = 10  #Points (tests, or periods with CHART_PERIOD) in the moving-average line on the stats charts
+TABLE_PATH = "results.table"  #Columnar copy of the results for range/percentile queries (table.py)
+HUD_FPS = 10  #Live WPM/accuracy readout repaints per second, independent of typing speed
+PROFILE_TRACE_PATH = "trace.json"  #Chrome trace-event file written on exit by --profile
+CHART_PERIOD = None  #Stats charts: None for one point per test, "day" or "week" for one mean per period
@@ -0,0 +1,36 @@
+import os, sys, time
+
+#Startup timing: import this first so the clock starts as early as possible
+#python app.py --startup-report (or TYPINGTEST_STARTUP_REPORT=1) prints where launch time goes
+
+PROCESS_START = time.perf_counter()
+
+
+class StartupTimer:
+    def __init__(self, enabled=None, budget_ms=None):
+        if enabled is None:
+            enabled = '--startup-report' in sys.argv or bool(os.environ.get('TYPINGTEST_STARTUP_REPORT'))
+        self.enabled = enabled
+        self.budget_ms = budget_ms
+        self.marks = []  # (name, ms since PROCESS_START)
+
+    def mark(self, name):
+        self.marks.append((name, (time.perf_counter() - PROCESS_START) * 1000))
+
+    @property
+    def total_ms(self):
+        return self.marks[-1][1] if self.marks else 0.0
+
+    def report(self):
+        lines, last = ['Startup (ms since launch):'], 0.0
+        for name, ms in self.marks:
+            lines.append(f'  {name:<20}{ms:8.1f}  (+{ms - last:.1f})')
+            last = ms
+        if self.budget_ms is not None:
+            verdict = 'OK' if self.total_ms <= self.budget_ms else 'OVER BUDGET'
+            lines.append(f'  ready in {self.total_ms:.1f} of {self.budget_ms} ms -> {verdict}')
+        return '\n'.join(lines)
+
+    def finish(self):  #Called once the first keystroke can be handled
+        if self.enabled:
+            print(self.report())
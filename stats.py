@@ -0,0 +1,80 @@
+import math
+
+#Running aggregates over finished tests, updated once per result so the stats view never rescans history
+
+METRICS = ('wpm', 'cpm', 'accuracy')
+
+
+class RunningStat:  #Count, sum, mean/variance (Welford), min and max of one metric
+    def __init__(self, count=0, total=0.0, mean=0.0, m2=0.0, low=None, high=None):
+        self.count, self.total, self.mean, self.m2 = count, total, mean, m2
+        self.low, self.high = low, high
+
+    def add(self, x):
+        self.count += 1
+        self.total += x
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.low = x if self.low is None else min(self.low, x)
+        self.high = x if self.high is None else max(self.high, x)
+
+    @property
+    def variance(self):  #Sample variance
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        return {'count': self.count, 'total': self.total, 'mean': self.mean, 'm2': self.m2,
+                'low': self.low, 'high': self.high}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class Aggregates:
+    def __init__(self):
+        self.stats = {metric: RunningStat() for metric in METRICS}
+        self.bests = {}  # metric -> the whole record that set the personal best
+        self.log_size = 0  # Size of the results log these aggregates cover, used to spot a stale file
+
+    def add(self, record):
+        for metric, stat in self.stats.items():
+            value = record.get(metric)
+            if value is None:
+                continue
+            stat.add(value)
+            best = self.bests.get(metric)
+            if best is None or value > best[metric]:
+                self.bests[metric] = record
+
+    @property
+    def count(self):
+        return self.stats['wpm'].count
+
+    def mean(self, metric):
+        return self.stats[metric].mean
+
+    @classmethod
+    def rebuild(cls, records):  #Full recompute from the raw log
+        aggregates = cls()
+        for record in records:
+            aggregates.add(record)
+        return aggregates
+
+    def to_dict(self):
+        return {'stats': {metric: stat.to_dict() for metric, stat in self.stats.items()},
+                'bests': self.bests, 'log_size': self.log_size}
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregates = cls()
+        for metric, stat in data.get('stats', {}).items():
+            aggregates.stats[metric] = RunningStat.from_dict(stat)
+        aggregates.bests = data.get('bests', {})
+        aggregates.log_size = data.get('log_size', 0)
+        return aggregates
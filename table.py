@@ -0,0 +1,106 @@
+import os, struct
+
+#Columnar copy of the results history: one fixed-width record per finished test, appended after an 8 byte header
+#Appends use struct only; queries memory-map the file as a NumPy structured array (numpy imported on first query)
+#Records are in append order, so time is ascending and range queries are a binary search
+
+MAGIC = b'TTSES\x01\x00\x00'
+RECORD = struct.Struct('<dBxxxiffffI')  # time, difficulty, passage, duration, wpm, cpm, accuracy, errors
+FIELDS = ('time', 'difficulty', 'passage', 'duration', 'wpm', 'cpm', 'accuracy', 'errors')
+FORMATS = ('<f8', 'u1', '<i4', '<f4', '<f4', '<f4', '<f4', '<u4')
+OFFSETS = (0, 8, 12, 16, 20, 24, 28, 32)
+DIFFICULTIES = ('simple', 'medium', 'hard')  # Stored as their index, anything else (long form) as NO_DIFFICULTY
+NO_DIFFICULTY = 255
+
+_dtype = None
+
+
+def record_dtype():
+    global _dtype
+    if _dtype is None:
+        import numpy as np
+        _dtype = np.dtype({'names': FIELDS, 'formats': FORMATS, 'offsets': OFFSETS, 'itemsize': RECORD.size})
+    return _dtype
+
+
+def difficulty_code(difficulty):
+    return DIFFICULTIES.index(difficulty) if difficulty in DIFFICULTIES else NO_DIFFICULTY
+
+
+def pack(record):  #Result dict (see ResultStore.append) to one fixed-width row
+    passage = record.get('passage')
+    return RECORD.pack(record.get('time', 0.0), difficulty_code(record.get('difficulty')),
+                       -1 if passage is None else passage, record.get('elapsed', 0.0),
+                       record.get('wpm', 0), record.get('cpm', 0), record.get('accuracy', 0), record.get('errors', 0))
+
+
+class SessionTable:
+    def __init__(self, path):
+        self.path = path
+        self._map, self._mapped_size = None, -1
+        if not os.path.exists(path):
+            with open(path, 'wb') as file:
+                file.write(MAGIC)
+        elif (os.path.getsize(path) - len(MAGIC)) % RECORD.size:  #Cut a row torn by a crash so appends stay aligned
+            with open(path, 'r+b') as file:
+                file.truncate(len(MAGIC) + len(self) * RECORD.size)
+
+    def __len__(self):
+        try:
+            return max(0, os.path.getsize(self.path) - len(MAGIC)) // RECORD.size  # A torn last row is ignored
+        except OSError:
+            return 0
+
+    def append(self, record):
+        self.append_many([record])
+
+    def append_many(self, records):
+        with open(self.path, 'ab') as file:
+            file.write(b''.join(map(pack, records)))
+
+    def rebuild(self, records):  #Rewrite the table from the results log
+        self._map, self._mapped_size = None, -1
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'wb') as file:
+            file.write(MAGIC)
+            for record in records:
+                file.write(pack(record))
+        os.replace(tmp, self.path)
+
+    def columns(self):  #Every row as a read-only memory-mapped structured array, remapped after appends
+        import numpy as np
+        count = len(self)
+        if self._mapped_size != count:
+            if count == 0:
+                self._map = np.empty(0, dtype=record_dtype())
+            else:
+                self._map = np.memmap(self.path, dtype=record_dtype(), mode='r', offset=len(MAGIC), shape=(count,))
+            self._mapped_size = count
+        return self._map
+
+    def between(self, start=None, end=None):  #Rows with start <= time < end, a view, nothing copied
+        rows = self.columns()
+        times = rows['time']
+        low = 0 if start is None else int(times.searchsorted(start, 'left'))
+        high = len(rows) if end is None else int(times.searchsorted(end, 'left'))
+        return rows[low:high]
+
+    def select(self, start=None, end=None, difficulty=None):
+        rows = self.between(start, end)
+        if difficulty is not None:
+            rows = rows[rows['difficulty'] == difficulty_code(difficulty)]
+        return rows
+
+    def percentile(self, column, q, start=None, end=None, difficulty=None):  #q may be a number or a list
+        import numpy as np
+        values = self.select(start, end, difficulty)[column]
+        return np.percentile(values, q) if len(values) else None
+
+    def summary(self, column='wpm', start=None, end=None, difficulty=None):
+        import numpy as np
+        values = self.select(start, end, difficulty)[column]
+        if not len(values):
+            return {'count': 0}
+        p50, p90 = np.percentile(values, [50, 90])
+        return {'count': len(values), 'mean': float(values.mean()), 'min': float(values.min()),
+                'max': float(values.max()), 'p50': float(p50), 'p90': float(p90)}
@@ -1,33 +1,19 @@
-import tkinter as tk, os, time, random, json
-from PIL import Image, ImageTk
-from matplotlib.font_manager import json_dump
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-
-
-def open_json(path):
-    try:
-        with open(path, 'r', encoding='utf-8') as file:
-            return json.load(file)
-    except Exception as e:
-        print(f'Error: {e}')
-        return {}
-
-
-def dump_json(data, path):
-    try:
-        with open(path, 'w') as file:
-            json.dump(data, file)
-    except Exception as e:
-        print(f'Error: {e}')
-
-
-def find_avg(i):
-    try:
-        return sum(i) / len(i)
-    except Exception as e:
-        print(f'Error: {e}')
-        return 0
+from startup import StartupTimer
+import tkinter as tk, os
+import tkinter.font as tkfont
+from corpus import load_corpus
+from glyphs import GlyphCache, bucket_size
+from results import ResultStore
+from keystrokes import KeystrokeRecorder, KeystrokeLog
+from layout import TextLayout
+from render import make_renderer, PENDING, CORRECT, WRONG
+from cursor import CursorAnimator
+from hud import Hud
+from worker import Worker
+from profiler import Profiler, ProfileOverlay
+from session import TypingSession
+from charts import StatsCharts
+import setting
 
 
 def resource_path(relative_path):
@@ -35,19 +21,26 @@ def resource_path(relative_path):
 
 
 class TypingTestApp:
-    def __init__(self, root):
+    def __init__(self, root, startup=None, profiler=None):
         self.root = root
+        self.startup = startup or StartupTimer(False)
+        self.profiler = profiler or Profiler(False)
         self.root.geometry("1280x720")
         self.root.minsize(800, 400)
-        self.sentence = self.get_sentence()
-        self.char_dict = self.create_char_dict()
-        self.current_index = 0
-        self.start_time, self.original_image, self.result_label, self.restart_button = None, None, None, None
+        self.ready, self.loading = False, False
+        self.long_form = False
+        self.practice_mode, self.practice, self.practice_index = False, None, None
+        self.renderer, self.session = None, None
+        self.current_char, self.result_label, self.restart_button = None, None, None
+        self.photo = None
+        self.pending, self.render_id = {}, None
+        self.glyph_size = bucket_size(min(setting.WIDTH, setting.HEIGHT - 84) * 0.3)
+        self.window_size, self.resize_after_id = None, None
         self.last_button = 2
-        self.red_line_id = None
-        self.flicker_state = 0
-        self.flicker_after_id = None
+        self.worker = Worker(self.root)
+        self.cursor = CursorAnimator(self.root, lambda color: self.renderer.cursor_color(color))
         self.avg_frame = None
+        self.diagram_frame, self.charts = None, None
 
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(1, weight=1)
@@ -56,18 +49,60 @@ class TypingTestApp:
         self.top_frame.grid(row=0, column=0, sticky="ew")
         self.top_frame.grid_propagate(False)
         self.create_buttons()
+        self.hud_label = tk.Label(self.top_frame, bg="#5D3E69", fg="#C894DC", font=("Arial", 14), justify="left")
+        self.hud_label.place(x=430, y=0, width=240, height=84)
+        self.hud = Hud(self.root, lambda text: self.hud_label.config(text=text), lambda: self.session, setting.HUD_FPS)
 
         self.main_frame = tk.Frame(root, bg="#373441")
         self.main_frame.grid(row=1, column=0, sticky="nsew")
         self.text_frame = tk.Frame(self.main_frame, bg="#373441")
         self.text_frame.place(relx=0.5, rely=0.5, anchor="center")
         self.show_image()
+        self.startup.mark('window built')
+        self.root.bind("<Map>", self.on_map)
+        self.start_profiling()
+
+    def start_profiling(self):
+        if not self.profiler.enabled:
+            return
+        self.profiler.instrument(self)
+        overlay_label = tk.Label(self.main_frame, bg="#373441", fg="#BEA8C7", font=("Courier", 10), justify="left")
+        overlay_label.place(relx=1.0, rely=0.0, anchor="ne")
+        ProfileOverlay(self.root, lambda text: overlay_label.config(text=text), self.profiler).start()
+
+    def on_map(self, event):
+        if event.widget is self.root and not self.loading:
+            self.loading = True
+            self.startup.mark('window mapped')
+            self.root.after(10, self.finish_startup)
+
+    def finish_startup(self):
+        self.corpus = load_corpus(resource_path(setting.CORPUS_PATH))
+        self.startup.mark('corpus')
+        self.results = ResultStore(resource_path(setting.RESULTS_PATH), resource_path('./data.json'),
+                                   resource_path(setting.TABLE_PATH), repair=False)
+        self.worker.call(self.results.repair)
+        self.keystroke_log = KeystrokeLog(resource_path(setting.KEYSTROKES_PATH))
+        self.recorder = KeystrokeRecorder()
+        self.startup.mark('results')
+        self.glyphs = GlyphCache(resource_path('content'))
+        self.startup.mark('glyphs')
+        self.text_font = tkfont.Font(family="Arial", size=25, weight="bold")
+        self.text_layout = TextLayout(self.text_font)
+        self.sentence = self.get_sentence()
+        self.session = self.create_session()
         self.create_text_grid()
+        self.startup.mark('first passage')
 
         self.root.bind("<Key>", self.handle_key_press)
         self.root.bind("<BackSpace>", self.handle_backspace)
-        self.root.bind("<Configure>", self.resize_image)
+        self.root.bind("<Configure>", self.on_configure)
         self.root.bind("<Return>", lambda event: self.restart() if self.restart_button else None)
+        self.cursor.start()
+        self.hud.start()
+        self.ready = True
+        self.startup.mark('ready')
+        self.startup.finish()
 
     def create_buttons(self):
         button_style = {
@@ -86,218 +121,229 @@ class TypingTestApp:
                   command=lambda: self.button_press(5)).place(x=1196, y=0, width=84, height=84)
 
     def button_press(self, number):
+        if not self.ready:
+            return
         if number == 1 and self.last_button != 1:
             self.destroy_menu(self.last_button)
             self.last_button = 1
             self.show_diagram_menu()
 
         elif number == 2 and self.last_button != 2:
-            self.restart()
             self.destroy_menu(self.last_button)
+            self.long_form, self.practice_mode = False, False
+            self.restart()
             self.last_button = 2
-        elif number == 3:
+        elif number == 3 and self.last_button != 3:
             self.destroy_menu(self.last_button)
+            self.long_form, self.practice_mode = True, False
+            self.restart()
             self.last_button = 3
         elif number == 4:
             self.destroy_menu(self.last_button)
             self.last_button = 4
-        elif number == 5:
+        elif number == 5 and self.last_button != 5:
             self.destroy_menu(self.last_button)
+            self.long_form, self.practice_mode = False, True
+            self.start_practice()
+            self.restart()
             self.last_button = 5
 
     def show_image(self):
         self.image_label = tk.Label(self.main_frame, bg="#373441")
         self.image_label.place(relx=0.0, rely=1.0, anchor="sw")
 
-    def create_char_dict(self):
-        char_dict = {}
-        for i, char in enumerate(self.sentence):
-            char_dict[i] = [char, False, None, True]
-        return char_dict
+    def create_session(self):
+        return TypingSession(self.sentence, self.recorder)
+
+    @property
+    def current_index(self):
+        return self.session.index
 
     def get_sentence(self):
-        difficulty = ''.join([i for i in random.choice(['simple', 'medium', 'hard']) if not i.isdigit()]).lower()
-        return open_json(resource_path("garbage - Copy.json"))[f'{difficulty}_{random.randint(1, 33)}']
+        if self.long_form:
+            self.passage_id = None
+            return self.long_form_text()
+        if self.practice_mode and self.practice is not None:
+            pid = self.practice.pick()
+            if pid is not None:
+                self.passage_id = pid
+                return self.corpus.passage(pid)
+        self.passage_id = self.corpus.pick()
+        return self.corpus.passage(self.passage_id)
+
+    def start_practice(self):
+        self.worker.call(self.load_practice, self.set_practice)
+
+    def load_practice(self):
+        from analytics import Analytics
+        from practice import Practice, load_index, weak_grams
+        if self.practice_index is None:
+            self.practice_index = load_index(self.corpus, resource_path(setting.CORPUS_PATH))
+        return Practice(self.corpus, self.practice_index,
+                        weak_grams(Analytics.load(resource_path(setting.KEYSTROKES_PATH))))
+
+    def set_practice(self, practice):
+        self.practice = practice
+
+    def long_form_text(self):
+        try:
+            with open(resource_path(setting.LONG_FORM_PATH), 'r', encoding='utf-8') as file:
+                return ' '.join(file.read().split())
+        except FileNotFoundError:
+            return ' '.join(self.corpus.sample() for _ in range(setting.LONG_FORM_PASSAGES))
 
     def show_diagram_menu(self):
-        # Destroy previous frames if necessary
-        if hasattr(self, 'diagram_frame'):
-            self.diagram_frame.destroy()
+        if self.diagram_frame is None:  # Built once, hidden and shown again afterwards
+            self.build_diagram_menu()
+        self.diagram_frame.place(relx=0.5, rely=0.5, anchor="center")
+
+        self.worker.call(self.stat_texts, self.show_stat_texts)
+        self.worker.call(self.keystroke_report, lambda text: self.report_label.config(text=text))
+        self.charts.refresh()
+
+    def stat_texts(self):
+        stats = self.results.stats
+        return {metric: f"Avg {stat.mean:.1f}\nBest {stat.high or 0}\n\u00b1{stat.stdev:.1f}"
+                for metric, stat in stats.stats.items() if metric in self.stat_labels}
+
+    def show_stat_texts(self, texts):
+        for metric, text in texts.items():
+            self.stat_labels[metric].config(text=text)
+
+    def keystroke_report(self):
+        from analytics import Analytics
+        return Analytics.load(resource_path(setting.KEYSTROKES_PATH)).report()
 
+    def set_chart_history(self, records):
+        self.charts.set_history(records)
+        self.charts.refresh()
+
+    def build_diagram_menu(self):
         self.diagram_frame = tk.Frame(self.main_frame, bg="#373441")
-        self.diagram_frame.place(relx=0.5, rely=0.5, anchor="center")
 
         # Labels and a layout similar to the provided image
         title_font = ("Arial", 24, "bold")
         label_font = ("Arial", 18)
 
+        self.stat_labels = {}
         for i in range(3):  # Create rows for WPM, CPM, and Accuracy
             tk.Label(self.diagram_frame, text=["WPM", "CPM", "Accuracy"][i],
                      bg="#373441", fg="#BEA8C7", font=title_font).grid(row=i, column=0, padx=10)
 
-            tk.Label(self.diagram_frame, text=["WPM", "CPM", "Accuracy"][i],
-                     bg="#373441", fg="#BEA8C7", font=title_font).grid(row=i, column=1, padx=10)
-
-            # Placeholder for matplotlib graph
-            self.draw_graph(i)  # Create placeholders for the graphs
-
-    def draw_graph(self, metric):
-        # Create some dummy data for demonstration
-        x_values = list(range(10))
-        if metric == 0:  # WPM
-            y_values = [random.randint(30, 100) for _ in x_values]
-        elif metric == 1:  # CPM
-            y_values = [random.randint(200, 500) for _ in x_values]
-        else:  # Accuracy
-            y_values = [random.randint(50, 100) for _ in x_values]
-
-        figure = plt.Figure(figsize=(5, 2), dpi=100, facecolor="#373441")
-        ax = figure.add_subplot(111)
-        ax.plot(x_values, y_values, color='pink', linewidth=2)
-        ax.set_title(["Words Per Minute", "Characters Per Minute", "Accuracy"][metric], color="#C894DC")
-        ax.set_facecolor("#373441")
-        ax.grid(color='purple', linestyle='--')
-
-        canvas = FigureCanvasTkAgg(figure, self.diagram_frame)
-        canvas.get_tk_widget().grid(row=metric, column=2)
-        canvas.draw()
+            label = tk.Label(self.diagram_frame, bg="#373441", fg="#BEA8C7", font=label_font)
+            label.grid(row=i, column=1, padx=10)
+            self.stat_labels[["wpm", "cpm", "accuracy"][i]] = label
+
+        self.charts = StatsCharts(self.diagram_frame, budget=setting.CHART_POINTS, window=setting.CHART_WINDOW,
+                                  period=setting.CHART_PERIOD)  # Figures are created here only
+        self.worker.call(lambda: list(self.results.records()), self.set_chart_history)
+        self.report_label = tk.Label(self.diagram_frame, justify="left",
+                                     bg="#373441", fg="#BEA8C7", font=("Arial", 12))
+        self.report_label.grid(row=3, column=0, columnspan=3, pady=10)
 
     def create_text_grid(self):
-        self.canvas = tk.Canvas(self.text_frame, bg="#373441", highlightthickness=0)
-        self.canvas.pack()
-        words = self.sentence.split()
-        current_x, current_y = 0, 0
-        char_index = 0
-        max_width = 1000
-        font = ("Arial", 25, "bold")
-        for word in words:
-            word_width = len(word) * 25
-            if current_x + word_width > max_width:
-                current_x = 0
-                current_y += 30
-            for char in word:
-                text_id = self.canvas.create_text(current_x, current_y,
-                                                  text=char, font=font, anchor="nw", fill="#BEA8C7")
-                self.char_dict[char_index][2] = text_id
-                bbox = self.canvas.bbox(text_id)
-                char_width = bbox[2] - bbox[0]
-                current_x += char_width + 2
-                char_index += 1
-            if char_index < len(self.sentence):
-                text_id = self.canvas.create_text(current_x, current_y,
-                                                  text=" ", font=font, anchor="nw", fill="#BEA8C7")
-                self.char_dict[char_index][2] = text_id
-                current_x += 10
-                char_index += 1
-        self.canvas.update()
-        canvas_width = self.canvas.bbox("all")[2]
-        canvas_height = self.canvas.bbox("all")[3] + 20
-        self.canvas.config(width=canvas_width, height=canvas_height)
+        kind = 'virtual' if self.long_form else setting.RENDERER
+        self.pending.clear()
+        self.renderer = make_renderer(kind, self.text_frame, self.text_font, self.text_layout)
+        self.renderer.draw(self.sentence, self.text_width())
         self.update_letter_image()
         self.update_red_line()
 
+    def text_width(self):
+        window_width = self.root.winfo_width()
+        if window_width <= 1:
+            window_width = setting.WIDTH
+        return max(400, int(window_width * 0.8))
+
+    def reflow_text(self):
+        if self.renderer.reflow(self.text_width()):
+            self.update_red_line()
+
     def update_letter_image(self):
         if self.current_index < len(self.sentence):
-            char = self.sentence[self.current_index].lower()
-            try:
-                self.original_image = Image.open(f"./content/{char}.png")
-                self.resize_image()
-            except FileNotFoundError:
-                self.image_label.config(image="")
+            self.current_char = self.sentence[self.current_index].lower()
+            self.show_letter_image()
+
+    def on_configure(self, event):
+        if event.widget is not self.root or (event.width, event.height) == self.window_size:
+            return
+        self.window_size = (event.width, event.height)
+        if self.resize_after_id is not None:
+            self.root.after_cancel(self.resize_after_id)
+        self.resize_after_id = self.root.after(setting.RESIZE_DEBOUNCE_MS, self.resize_image)
 
     def resize_image(self, event=None):
-        if self.original_image:
-            window_width = self.root.winfo_width()
-            window_height = self.root.winfo_height() - 84
-            min_dimension = min(window_width, window_height)
-            new_size = int(min_dimension * 0.3)
-            if new_size < 32:
-                new_size = 32
-            resized_img = self.original_image.resize((new_size, new_size), Image.Resampling.LANCZOS)
-            self.photo = ImageTk.PhotoImage(resized_img)
-            self.image_label.config(image=self.photo)
+        self.resize_after_id = None
+        window_width = self.root.winfo_width()
+        window_height = self.root.winfo_height() - 84
+        min_dimension = min(window_width, window_height)
+        self.glyph_size = bucket_size(min_dimension * 0.3)
+        self.show_letter_image()
+        self.reflow_text()
+
+    def show_letter_image(self):
+        if self.current_char and self.image_label:
+            photo = self.glyphs.get(self.current_char, self.glyph_size)
+            if photo is not self.photo:
+                self.photo = photo
+                self.image_label.config(image=photo or "")
 
     def update_red_line(self):
-        if self.red_line_id:
-            self.canvas.delete(self.red_line_id)
-            if self.flicker_after_id is not None:
-                self.root.after_cancel(self.flicker_after_id)
-                self.flicker_after_id = None
-        if self.current_index < len(self.sentence):
-            text_id = self.char_dict[self.current_index][2]
-            bbox = self.canvas.bbox(text_id)
-            if bbox:
-                x1, y1, x2, y2 = bbox
-                width = x2 - x1
-                self.red_line_id = self.canvas.create_rectangle(
-                    x1, y2 - 6, x1 + width, y2 - 3,
-                    fill="#B026E7",
-                    outline="",
-                    tags="red_line"
-                )
-                self.canvas.lift(self.red_line_id)
-                self.flicker_red_line()
-
-    def flicker_red_line(self):
-        if self.red_line_id:
-            steps = 200
-            self.flicker_state = (self.flicker_state + 1) % (steps * 2)
-            if self.flicker_state < steps:
-                intensity = self.flicker_state / steps
-            else:
-                intensity = (steps * 2 - self.flicker_state) / steps
-            color1 = (0x37, 0x34, 0x41)
-            color2 = (0xB0, 0x26, 0xE7)
-            r = int(color1[0] + (color2[0] - color1[0]) * intensity)
-            g = int(color1[1] + (color2[1] - color1[1]) * intensity)
-            b = int(color1[2] + (color2[2] - color1[2]) * intensity)
-            color = f"#{r:02x}{g:02x}{b:02x}"
-            self.canvas.itemconfig(self.red_line_id, fill=color)
-            self.flicker_after_id = self.root.after(50, self.flicker_red_line)
+        self.cursor.visible = self.renderer.show_cursor(self.current_index)
 
     def handle_key_press(self, event):
-        if self.current_index >= len(self.char_dict) or event.char == '':
+        index = self.current_index
+        correct = self.session.feed(event.char)
+        if correct is None:
             return
-        if self.start_time is None:
-            self.start_time = time.time()
-        expected_char = self.char_dict[self.current_index][0]
-        if event.char == expected_char:
-            self.char_dict[self.current_index][1] = True
-            self.canvas.itemconfig(self.char_dict[self.current_index][2], fill="green")
-        else:
-            self.char_dict[self.current_index][1] = False
-            self.canvas.itemconfig(self.char_dict[self.current_index][2], fill="red")
-        self.current_index += 1
-        self.update_letter_image()
-        self.update_red_line()
-        if self.current_index == len(self.char_dict):
+        self.pending[index] = CORRECT if correct else WRONG
+        self.schedule_render()
+        if self.session.finished:
+            self.render_pending()
             self.show_results()
 
     def handle_backspace(self, event):
-        if self.current_index > 0:
-            self.current_index -= 1
-            self.char_dict[self.current_index][1] = False
-            self.char_dict[self.current_index][3] = False
-            self.canvas.itemconfig(self.char_dict[self.current_index][2], fill="#BEA8C7")
-            self.update_letter_image()
-            self.update_red_line()
+        index = self.session.backspace()
+        if index is not None:
+            self.pending[index] = PENDING
+            self.schedule_render()
+
+    def schedule_render(self):
+        if self.render_id is None:
+            self.render_id = self.root.after_idle(self.render_pending)
+
+    def render_pending(self):
+        if self.render_id is not None:
+            self.root.after_cancel(self.render_id)
+            self.render_id = None
+        for index, state in self.pending.items():
+            self.renderer.mark(index, state)
+        self.pending.clear()
+        self.update_letter_image()
+        self.update_red_line()
+
+    def add_chart_record(self, record):
+        if self.charts:
+            self.charts.add(record)
+            if self.last_button == 1:
+                self.charts.refresh()
 
     def show_results(self):
-        end_time = time.time()
-        elapsed_minutes = (end_time - self.start_time) / 60 if self.start_time else 0
-        correct = sum(1 for char_info in self.char_dict.values() if char_info[1] and char_info[3])
-        total = len(self.char_dict)
-        accuracy = (correct / total) * 100 if total > 0 else 0
-        wpm = (total / 5) / elapsed_minutes if elapsed_minutes > 0 else 0
-        cpm = total / elapsed_minutes if elapsed_minutes > 0 else 0
+        result = self.session.result()
+        accuracy, wpm, cpm = result['accuracy'], result['wpm'], result['cpm']
+        correct, total = result['correct'], result['total']
         self.text_frame.place(relx=0.5, rely=0, anchor="n")
-        data = open_json(resource_path('./data.json'))
-        data[f'{len(data) + 1}'] = {
+        self.worker.write(self.results.append_many, {
             "wpm": int(wpm),
             "cpm": int(cpm),
-            'accuracy': int(accuracy)
-        }
-        dump_json(data, resource_path('./data.json'))
+            'accuracy': int(accuracy),
+            'session': self.recorder.session_id,
+            'passage': self.passage_id,
+            'difficulty': None if self.passage_id is None else self.corpus.difficulty_of(self.passage_id),
+            'elapsed': round(result['elapsed'], 3),
+            'errors': result['errors']
+        }, self.add_chart_record)
+        self.worker.write(self.keystroke_log.append_blocks, KeystrokeLog.encode(self.recorder))
         result_text = (f"Test Complete!\n"
                        f"Accuracy: {accuracy:.2f}%\n"
                        f"WPM: {wpm:.2f}\n"
@@ -322,18 +368,16 @@ class TypingTestApp:
         if self.restart_button:
             self.restart_button.destroy()
             self.restart_button = None
-        self.canvas.destroy()
+        self.renderer.destroy()
         self.text_frame.place(relx=0.5, rely=0.5, anchor="center")
         if self.image_label is None:
             self.show_image()
-        self.current_index = 0
-        self.start_time, self.original_image, self.red_line_id = None, None, None
-        if self.flicker_after_id is not None:
-            self.root.after_cancel(self.flicker_after_id)
-            self.flicker_after_id = None
+            self.photo = None
+        self.recorder.reset()
+        self.current_char, self.cursor.visible = None, False
         new_sentence = self.get_sentence()
         self.sentence = new_sentence
-        self.char_dict = self.create_char_dict()
+        self.session = self.create_session()
         self.create_text_grid()
 
     def destroy_menu(self, ID):
@@ -341,33 +385,35 @@ class TypingTestApp:
             self.avg_frame.destroy()
             self.avg_frame = None
         if ID == 1:
-            print('there is nothing to destroy')
-        elif ID == 2:
+            if self.diagram_frame:
+                self.diagram_frame.place_forget()
+        elif ID in (2, 3, 5):
             if self.result_label:
                 self.result_label.destroy()
                 self.result_label = None
             if self.restart_button:
                 self.restart_button.destroy()
                 self.restart_button = None
-            self.canvas.delete("all")
+            self.renderer.clear()
+            self.pending.clear()
             self.text_frame.place(relx=0.5, rely=0.5, anchor="center")
-            self.current_index = 0
+            self.session.reset()
             self.image_label.destroy()
-            self.start_time, self.original_image, self.red_line_id, self.image_label = None, None, None, None
+            self.current_char, self.cursor.visible, self.image_label = None, False, None
+            self.photo = None
             self.last_button = 1
-        elif ID == 3:
-            print('there is nothing to destroy')
         elif ID == 4:
             print('there is nothing to destroy')
-        elif ID == 5:
-            print('there is nothing to destroy')
 
 
 def main():
     root = tk.Tk()
     root.title("BombApp")
-    app = TypingTestApp(root)
+    app = TypingTestApp(root, StartupTimer(budget_ms=setting.STARTUP_BUDGET_MS), Profiler())
     root.mainloop()
+    if app.profiler.enabled:
+        print(f'Wrote {app.profiler.export(resource_path(setting.PROFILE_TRACE_PATH))} trace events to {setting.PROFILE_TRACE_PATH}')
+    app.worker.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+import queue, threading
+
+#Background disk worker: one thread runs every write and every history load, in the order they were queued
+#Writes queued to the same target are handed over as one batch (one fsync); callbacks run on the Tk thread,
+#picked up by a root.after poll because Tk must not be called from the worker
+
+_STOP = object()
+
+
+class Worker:
+    def __init__(self, root, interval=50):
+        self.root = root
+        self.interval = interval  # ms between checks for finished jobs while any are outstanding
+        self.jobs, self.done = queue.Queue(), queue.Queue()
+        self.outstanding = 0  # Jobs with a callback still to deliver, only touched on the Tk thread
+        self.after_id = None
+        self.thread = threading.Thread(target=self._run, name='disk-worker', daemon=True)
+        self.thread.start()
+
+    def write(self, write_many, item, callback=None):  #write_many(items) -> results, one call per run of queued writes
+        self._put(write_many, item, callback, True)
+
+    def call(self, func, callback=None):  #func() on the worker, callback(result) back on the Tk thread
+        self._put(func, None, callback, False)
+
+    def _put(self, func, item, callback, batch):
+        self.jobs.put((func, item, callback, batch))
+        if callback is not None:
+            self.outstanding += 1
+            if self.after_id is None:
+                self.after_id = self.root.after(self.interval, self._poll)
+
+    def _run(self):
+        while True:
+            jobs = [self.jobs.get()]
+            while True:  #Take everything already queued so writes can be batched
+                try:
+                    jobs.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+            stop = _STOP in jobs
+            if stop:
+                jobs = jobs[:jobs.index(_STOP)]
+            for run in self._runs(jobs):
+                self._execute(run)
+            if stop:
+                return
+
+    @staticmethod
+    def _runs(jobs):  #Writes between two call() jobs grouped by target, e.g. R,K,R,K -> [R,R],[K,K]
+        groups = {}
+        for job in jobs:
+            if job[3]:
+                groups.setdefault(job[0], []).append(job)
+            else:  #A call sees every write queued before it
+                yield from groups.values()
+                groups = {}
+                yield [job]
+        yield from groups.values()
+
+    def _execute(self, run):
+        func, batch = run[0][0], run[0][3]
+        try:
+            results = func([job[1] for job in run]) if batch else [func()]
+        except Exception as e:
+            print(f'Error: {e}')
+            results = None
+        for i, (_, _, callback, _) in enumerate(run):
+            if callback is not None:  #A failed job still reports, with no callback, so the poll can stop
+                self.done.put((callback, results[i]) if results is not None else (None, None))
+
+    def _poll(self):  #Tk thread: deliver finished callbacks, keep polling while any are outstanding
+        self.after_id = None
+        while True:
+            try:
+                callback, result = self.done.get_nowait()
+            except queue.Empty:
+                break
+            self.outstanding -= 1
+            if callback is not None:
+                callback(result)
+        if self.outstanding > 0:
+            self.after_id = self.root.after(self.interval, self._poll)
+
+    def close(self, timeout=10):  #Finish every queued write, called after mainloop returns
+        self.jobs.put(_STOP)
+        self.thread.join(timeout)